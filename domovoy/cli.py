@@ -36,6 +36,15 @@ if __name__ == "__main__":
 
     logging.getLogger("asyncio").setLevel(logging.DEBUG)
 
+    # uvloop is optional; fall back to the default loop where it is not installed (e.g. Windows)
+    try:
+        import uvloop  # pyright: ignore[reportMissingImports]
+
+        loop_factory = uvloop.new_event_loop
+    except ImportError:
+        loop_factory = None
+
     asyncio.run(
         start(wait_for_all_tasks_before_exit=args.wait_on_all_tasks),
+        loop_factory=loop_factory,
     )
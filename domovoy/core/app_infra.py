@@ -13,7 +13,6 @@ from apscheduler.job import Job
 from apscheduler.triggers.base import BaseTrigger
 
 from domovoy.applications import AppBase, AppConfigBase, EmptyAppConfig
-from domovoy.core.configuration import get_main_config
 from domovoy.core.context import (
     context_callback_id,
     context_logger,
@@ -25,7 +24,7 @@ from domovoy.core.errors import (
     DomovoyUnknownPluginError,
 )
 from domovoy.core.logging import LoggerAdapterWithTrace, get_logger
-from domovoy.core.utils import get_callback_name, set_callback_true_information
+from domovoy.core.utils import get_callback_name, get_config_timezone, set_callback_true_information
 from domovoy.plugins.plugins import AppPlugin
 
 TConfig = TypeVar("TConfig", bound=AppConfigBase, contravariant=True)
@@ -278,10 +277,10 @@ class AppWrapper:
 
         if registration:
             registration.times_called += 1
-            registration.last_call_datetime = datetime.datetime.now(tz=get_main_config().get_timezone())
+            registration.last_call_datetime = datetime.datetime.now(tz=get_config_timezone())
 
     def __callback_failed(self, callback_id: str | int) -> None:
         registration = self.__get_callback_registration(callback_id)
 
         if registration:
-            registration.last_error_datetime = datetime.datetime.now(tz=get_main_config().get_timezone())
+            registration.last_error_datetime = datetime.datetime.now(tz=get_config_timezone())
@@ -18,3 +18,9 @@ context_callback_id: contextvars.ContextVar[str | int | None] = contextvars.Cont
     "context_callback_id",
     default=None,
 )
+
+
+def set_context_logger(logger: LoggerAdapterWithTrace[logging.Logger]) -> None:
+    # ContextVar.set always allocates a token, so skip it when the logger is already the current one
+    if context_logger.get(None) is not logger:
+        context_logger.set(logger)
@@ -44,7 +44,9 @@ def __add_trace_logging_level(level_num: int) -> None:
     setattr(logging, "trace", _log_to_root)  # noqa: B010
 
 
-__add_trace_logging_level(logging.DEBUG - 5)
+TRACE_LEVEL = logging.DEBUG - 5
+
+__add_trace_logging_level(TRACE_LEVEL)
 
 
 class BraceMessage:
@@ -3,7 +3,7 @@ from __future__ import annotations
 import datetime
 import logging
 import uuid
-from collections.abc import Awaitable, Callable
+from collections.abc import Awaitable, Callable, Sequence
 from typing import Concatenate, ParamSpec
 
 import apscheduler
@@ -338,11 +338,44 @@ class CallbackRegister(DomovoyService):
             "Adding Event Callback for app {app_name}",
             app_name=app_wrapper.get_app_name_for_logs(),
         )
-        callback_id = f"event-{uuid.uuid4().hex}"
 
         if isinstance(events, str):
             events = [events]
 
+        callback_id = self.__add_event_callback_registration(app_wrapper, callback, events)
+
+        if app_wrapper.status == AppStatus.RUNNING:
+            self.register_all_callbacks(app_wrapper)
+
+        return callback_id
+
+    def add_event_callbacks(
+        self,
+        app_wrapper: AppWrapper,
+        callback: Callable[P, Awaitable[None]],
+        events: Sequence[str],
+    ) -> list[str]:
+        c_logger().trace(
+            "Adding {count} Event Callbacks for app {app_name}",
+            count=len(events),
+            app_name=app_wrapper.get_app_name_for_logs(),
+        )
+
+        callback_ids = [self.__add_event_callback_registration(app_wrapper, callback, [event]) for event in events]
+
+        if app_wrapper.status == AppStatus.RUNNING:
+            self.register_all_callbacks(app_wrapper)
+
+        return callback_ids
+
+    def __add_event_callback_registration(
+        self,
+        app_wrapper: AppWrapper,
+        callback: Callable[P, Awaitable[None]],
+        events: list[str],
+    ) -> str:
+        callback_id = f"event-{uuid.uuid4().hex}"
+
         app_wrapper.event_callbacks[callback_id] = EventCallbackRegistration(
             id=callback_id,
             callback=callback,
@@ -350,9 +383,6 @@ class CallbackRegister(DomovoyService):
             events=events,
         )
 
-        if app_wrapper.status == AppStatus.RUNNING:
-            self.register_all_callbacks(app_wrapper)
-
         return callback_id
 
     async def publish_event(self, event: str, event_data: dict[str, str]) -> None:
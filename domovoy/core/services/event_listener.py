@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import uuid
-from collections.abc import Awaitable, Callable
+from collections.abc import Awaitable, Callable, Sequence
 from dataclasses import dataclass, field
 from typing import Any
 
@@ -24,6 +24,7 @@ class ListenerRegistration:
 class EventListener(DomovoyService):
     __registered_callbacks_by_event: dict[str, dict[str, ListenerRegistration]]
     __registered_callbacks_by_id: dict[str, ListenerRegistration]
+    __callables_by_event: dict[str, dict[str, Callable[[str, str, dict[str, Any]], Awaitable[None]]]]
     __is_running: bool = False
     __running_callbacks: set[asyncio.Future[Any]]
 
@@ -31,6 +32,7 @@ class EventListener(DomovoyService):
         super().__init__(resources)
         self.__registered_callbacks_by_event = {}
         self.__registered_callbacks_by_id = {}
+        self.__callables_by_event = {}
         self.__running_callbacks = set()
 
     def start(self) -> None:
@@ -54,27 +56,70 @@ class EventListener(DomovoyService):
             )
             return
 
-        if event_name not in self.__registered_callbacks_by_event:
+        callables = self.__callables_by_event.get(event_name)
+
+        if not callables:
             _logcore.trace(
                 "No listeners are registered for event: {event_name}",
                 event_name=event_name,
             )
             return  # No listener for this event
 
-        callbacks = self.__registered_callbacks_by_event[event_name]
+        if len(callables) == 1:
+            # Most events have a single listener, so there is no need to pay for a gather
+            ((listener_id, callback),) = callables.items()
+            task = asyncio.ensure_future(callback(listener_id, event_name, event_data))
 
-        async_calls: list[Awaitable[None]] = [
-            callback.callable(callback.id, event_name, event_data) for callback in callbacks.values()
-        ]
+        else:
+            async_calls: list[Awaitable[None]] = [
+                callback(listener_id, event_name, event_data) for listener_id, callback in callables.items()
+            ]
 
-        _logcore.trace(
-            "Gathering all async callbacks for event {event_name}",
-            event_name=event_name,
-        )
+            _logcore.trace(
+                "Gathering all async callbacks for event {event_name}",
+                event_name=event_name,
+            )
+
+            task = asyncio.ensure_future(asyncio.gather(*async_calls))
+
+        running_callbacks = self.__running_callbacks
+        running_callbacks.add(task)
+        task.add_done_callback(running_callbacks.discard)
+
+    async def publish_events(self, events: Sequence[tuple[str, dict[str, Any]]]) -> None:
+        if not self.__is_running:
+            _logcore.trace(
+                "Attempted to publish events, but the EventListener is not running",
+            )
+            return
+
+        # Listeners for every event in the batch are scheduled together, under a single task
+        async_calls: list[Awaitable[None]] = []
+        for event_name, event_data in events:
+            _logcore.trace(
+                "Publishing event: {event_name} with data: {event_data}",
+                event_name=event_name,
+                event_data=event_data,
+            )
+
+            callables = self.__callables_by_event.get(event_name)
+
+            if callables:
+                async_calls.extend(
+                    callback(listener_id, event_name, event_data) for listener_id, callback in callables.items()
+                )
+
+        if not async_calls:
+            return
+
+        if len(async_calls) == 1:
+            task = asyncio.ensure_future(async_calls[0])
+        else:
+            task = asyncio.ensure_future(asyncio.gather(*async_calls))
 
-        task = asyncio.ensure_future(asyncio.gather(*async_calls))
-        self.__running_callbacks.add(task)
-        task.add_done_callback(lambda t: self.__running_callbacks.remove(t))
+        running_callbacks = self.__running_callbacks
+        running_callbacks.add(task)
+        task.add_done_callback(running_callbacks.discard)
 
     def add_listener(
         self,
@@ -99,8 +144,12 @@ class EventListener(DomovoyService):
         for event in events:
             if event not in self.__registered_callbacks_by_event:
                 self.__registered_callbacks_by_event[event] = {}
+                self.__callables_by_event[event] = {}
 
             self.__registered_callbacks_by_event[event][listener_id] = registration
+            # Dispatch only needs the id and the callable, so it reads from this flat mapping instead of
+            # going through each registration
+            self.__callables_by_event[event][listener_id] = callback
 
         return listener_id
 
@@ -122,3 +171,4 @@ class EventListener(DomovoyService):
         for event in registration.events:
             wrap = self.__registered_callbacks_by_event[event]
             wrap.pop(listener_id)
+            self.__callables_by_event[event].pop(listener_id)
@@ -3,13 +3,29 @@ from collections.abc import Callable
 from datetime import datetime
 from enum import StrEnum
 from typing import TypeVar
+from zoneinfo import ZoneInfo
 
-from domovoy.core.configuration import MainConfig, get_main_config
+from dateutil.parser import parse
+
+from domovoy.core.configuration import get_main_config
+
+
+@functools.lru_cache(maxsize=1)
+def get_config_timezone() -> ZoneInfo:
+    # The main config can only be set once, so the timezone never changes after the first successful call
+    return ZoneInfo(get_main_config().timezone)
 
 
 def get_datetime_now_with_config_timezone() -> datetime:
-    config: MainConfig = get_main_config()
-    return datetime.now(config.get_timezone())
+    return datetime.now(get_config_timezone())
+
+
+def parse_datetime(value: str) -> datetime:
+    # Most strings we get are ISO 8601, which fromisoformat handles far faster than dateutil's heuristics
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return parse(value)
 
 
 def as_float(x: str, default: float | None = None) -> float | None:
@@ -73,18 +89,18 @@ def get_true_callback_if_functools(callback: Callable) -> Callable:
 
 def get_callback_true_name(callback: Callable) -> str:
     callback = get_true_callback_if_functools(callback)
-    try:
-        return callback._true_name  # type: ignore[attr-defined]  # noqa: SLF001
-    except AttributeError:
-        return callback.__name__
+    name = getattr(callback, "_true_name", None)
+    if name is not None:
+        return name
+
+    # Callable instances have no __name__, so we report the method that will actually run
+    return getattr(callback, "__name__", "__call__")
 
 
 def get_callback_true_class(callback: Callable) -> str:
     callback = get_true_callback_if_functools(callback)
-    try:
-        return callback._true_class  # type: ignore[attr-defined]  # noqa: SLF001
-    except AttributeError:
-        return get_callback_class(callback)
+    class_name = getattr(callback, "_true_class", None)
+    return class_name if class_name is not None else get_callback_class(callback)
 
 
 def get_callback_class(callback: Callable) -> str:
@@ -100,8 +116,10 @@ def get_callback_class(callback: Callable) -> str:
 
 
 def set_callback_true_information(callback: Callable, true_callback: Callable) -> None:
-    callback._true_name = get_callback_true_name(true_callback)  # type: ignore[attr-defined]  # noqa: SLF001
-    callback._true_class = get_callback_class(true_callback)  # type: ignore[attr-defined]  # noqa: SLF001
+    # callback is always a function created by a wrapper, so it has a writable __dict__
+    callback_dict = callback.__dict__
+    callback_dict["_true_name"] = get_callback_true_name(true_callback)
+    callback_dict["_true_class"] = get_callback_class(true_callback)
 
 
 def get_callback_name(callback: Callable) -> str:
@@ -3,29 +3,31 @@ from __future__ import annotations
 import asyncio
 import datetime
 import inspect
-from collections.abc import Awaitable, Callable, Sequence
-from typing import TYPE_CHECKING, Any, Concatenate, Literal, ParamSpec, TypeVar
+from collections.abc import Awaitable, Callable, Mapping, Sequence
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Concatenate, Literal, ParamSpec, TypeVar, cast
+from weakref import WeakKeyDictionary
 
 from astral.location import Location
-from dateutil.parser import parse
 
 from domovoy.applications.types import Interval
 from domovoy.core.configuration import get_main_config
 from domovoy.core.context import context_logger
 from domovoy.core.errors import DomovoySchedulerError
-from domovoy.core.logging import get_logger
+from domovoy.core.logging import TRACE_LEVEL, get_logger
 from domovoy.core.utils import (
     get_callback_class,
     get_callback_name,
     get_callback_true_name,
+    get_config_timezone,
     get_datetime_now_with_config_timezone,
     is_datetime_aware,
-    set_callback_true_information,
+    parse_datetime,
 )
 from domovoy.plugins import hass
 from domovoy.plugins.callbacks.entity_listener_callbacks import EntityListenerCallback
 from domovoy.plugins.callbacks.event_listener_callbacks import EventListenerCallback
-from domovoy.plugins.hass.domains import get_type_instance_for_entity_id
+from domovoy.plugins.hass.domains import get_type_instance_for_entity_id, wrap_entity_id_as_list
 from domovoy.plugins.hass.types import EntityID, HassValue
 from domovoy.plugins.plugins import AppPlugin
 
@@ -39,6 +41,126 @@ T = TypeVar("T")
 SunEvents = Literal["dawn", "sunrise", "noon", "sunset", "dusk"]
 _logcore = get_logger(__name__)
 
+# Shared fallback for missing state payloads. Read-only, since "all" listeners receive it as old/new
+_EMPTY_STATE: Mapping[str, Any] = MappingProxyType({})
+
+_callback_parameters_cache: WeakKeyDictionary[Callable, frozenset[str]] = WeakKeyDictionary()
+
+
+_SUN_EVENTS_CACHE_MAX_SIZE = 32
+_sun_events_cache: dict[tuple[float, float, str, datetime.date], dict[str, datetime.datetime]] = {}
+
+
+def _get_sun_events(astral_location: Location, date: datetime.date) -> dict[str, datetime.datetime]:
+    key = (astral_location.latitude, astral_location.longitude, astral_location.timezone, date)
+    sun_events = _sun_events_cache.get(key)
+
+    if sun_events is None:
+        if len(_sun_events_cache) >= _SUN_EVENTS_CACHE_MAX_SIZE:
+            _sun_events_cache.clear()
+
+        sun_events = astral_location.sun(date, local=True)
+        _sun_events_cache[key] = sun_events
+
+    return sun_events
+
+
+def _as_state_dict(state: Mapping[str, Any]) -> dict[str, Any]:
+    # The shared sentinel stays internal; listeners get their own empty dict for a missing state
+    return {} if state is _EMPTY_STATE else cast("dict[str, Any]", state)
+
+
+def _extract_all_values(
+    new_state: Mapping[str, Any],
+    old_state: Mapping[str, Any],
+) -> tuple[HassValue, HassValue, bool]:
+    return _as_state_dict(old_state), _as_state_dict(new_state), True
+
+
+def _extract_state_values(
+    new_state: Mapping[str, Any],
+    old_state: Mapping[str, Any],
+) -> tuple[HassValue, HassValue, bool]:
+    old_value = old_state.get("state")
+    new_value = new_state.get("state")
+    return old_value, new_value, old_value != new_value
+
+
+_VALUE_EXTRACTORS: dict[str, Callable[[Mapping[str, Any], Mapping[str, Any]], tuple[HassValue, HassValue, bool]]] = {
+    "all": _extract_all_values,
+    "state": _extract_state_values,
+}
+
+
+def _ensure_entity_id(entity_id: EntityID) -> EntityID:
+    if type(entity_id) is str:
+        raise TypeError("Passed entity_id as str and not as EntityID")
+
+    return entity_id
+
+
+def _get_callback_parameters(callback: Callable) -> frozenset[str]:
+    # Bound methods are created on every attribute access, so we key the cache on the underlying function
+    key = getattr(callback, "__func__", callback)
+
+    try:
+        parameters = _callback_parameters_cache.get(key)
+    except TypeError:
+        # Not weak-referenceable, so it can't be cached
+        return frozenset(inspect.signature(callback).parameters)
+
+    if parameters is None:
+        parameters = frozenset(inspect.signature(key).parameters)
+        _callback_parameters_cache[key] = parameters
+
+    return parameters
+
+
+# Adapters are indexed by a bitmask of the parameters the callback accepts, in the order of
+# the *_CALLBACK_PARAMETERS tuples, so the arguments don't have to be filtered on every call.
+_EVENT_CALLBACK_PARAMETERS = ("event_name", "data")
+_EVENT_CALLBACK_ADAPTERS: dict[int, Callable[[Callable], Callable[[str, dict[str, Any]], Any]]] = {
+    0b00: lambda cb: lambda _event_name, _data: cb(),
+    0b01: lambda cb: lambda event_name, _data: cb(event_name=event_name),
+    0b10: lambda cb: lambda _event_name, data: cb(data=data),
+    0b11: lambda cb: lambda event_name, data: cb(event_name=event_name, data=data),
+}
+
+_ATTRIBUTE_CALLBACK_PARAMETERS = ("entity_id", "attribute", "old", "new")
+_ATTRIBUTE_CALLBACK_ADAPTERS: dict[int, Callable[[Callable], Callable[[EntityID, str, HassValue, HassValue], Any]]] = {
+    0b0000: lambda cb: lambda _entity_id, _attribute, _old, _new: cb(),
+    0b0001: lambda cb: lambda entity_id, _attribute, _old, _new: cb(entity_id=entity_id),
+    0b0010: lambda cb: lambda _entity_id, attribute, _old, _new: cb(attribute=attribute),
+    0b0011: lambda cb: lambda entity_id, attribute, _old, _new: cb(entity_id=entity_id, attribute=attribute),
+    0b0100: lambda cb: lambda _entity_id, _attribute, old, _new: cb(old=old),
+    0b0101: lambda cb: lambda entity_id, _attribute, old, _new: cb(entity_id=entity_id, old=old),
+    0b0110: lambda cb: lambda _entity_id, attribute, old, _new: cb(attribute=attribute, old=old),
+    0b0111: lambda cb: lambda entity_id, attribute, old, _new: cb(entity_id=entity_id, attribute=attribute, old=old),
+    0b1000: lambda cb: lambda _entity_id, _attribute, _old, new: cb(new=new),
+    0b1001: lambda cb: lambda entity_id, _attribute, _old, new: cb(entity_id=entity_id, new=new),
+    0b1010: lambda cb: lambda _entity_id, attribute, _old, new: cb(attribute=attribute, new=new),
+    0b1011: lambda cb: lambda entity_id, attribute, _old, new: cb(entity_id=entity_id, attribute=attribute, new=new),
+    0b1100: lambda cb: lambda _entity_id, _attribute, old, new: cb(old=old, new=new),
+    0b1101: lambda cb: lambda entity_id, _attribute, old, new: cb(entity_id=entity_id, old=old, new=new),
+    0b1110: lambda cb: lambda _entity_id, attribute, old, new: cb(attribute=attribute, old=old, new=new),
+    0b1111: lambda cb: lambda entity_id, attribute, old, new: cb(
+        entity_id=entity_id,
+        attribute=attribute,
+        old=old,
+        new=new,
+    ),
+}
+
+
+def _build_callback_adapter(
+    callback: Callable,
+    parameter_names: tuple[str, ...],
+    adapters: dict[int, Callable[[Callable], Callable[..., Any]]],
+) -> Callable[..., Any]:
+    valid_params = _get_callback_parameters(callback)
+    mask = sum(1 << i for i, name in enumerate(parameter_names) if name in valid_params)
+    return adapters[mask](callback)
+
 
 class CallbacksPlugin(AppPlugin):
     _wrapper: AppWrapper
@@ -64,23 +186,8 @@ class CallbacksPlugin(AppPlugin):
         *,
         oneshot: bool = False,
     ) -> str:
-        signature = inspect.signature(callback)
-        valid_params = set(signature.parameters.keys())
-
-        async def wrapper(event_name: str, data: dict[str, Any]) -> None:
-            call_args = {}
-            if "event_name" in valid_params:
-                call_args["event_name"] = event_name
-            if "data" in valid_params:
-                call_args["data"] = data
-
-            result = callback(**call_args)
-
-            if inspect.isawaitable(result):
-                await result
-
-        set_callback_true_information(wrapper, callback)
-        return self.listen_event_extended(events, wrapper, oneshot)
+        call_callback = _build_callback_adapter(callback, _EVENT_CALLBACK_PARAMETERS, _EVENT_CALLBACK_ADAPTERS)
+        return self.__listen_event(events, callback, call_callback, oneshot)
 
     def listen_event_extended(
         self,
@@ -89,10 +196,23 @@ class CallbacksPlugin(AppPlugin):
         oneshot: bool = False,  # noqa: FBT001, FBT002
         *callback_args: P.args,
         **callback_kwargs: P.kwargs,
+    ) -> str:
+        return self.__listen_event(events, callback, callback, oneshot, *callback_args, **callback_kwargs)
+
+    def __listen_event(
+        self,
+        events: str | list[str],
+        callback: Callable,
+        call_callback: Callable[Concatenate[str, dict[str, Any], P], None | Awaitable[None]],
+        oneshot: bool,  # noqa: FBT001
+        *callback_args: P.args,
+        **callback_kwargs: P.kwargs,
     ) -> str:
         context_logger.set(self._wrapper.logger)
 
-        instrumented_callback = self._wrapper.instrument_app_callback(callback)
+        instrumented_callback = self._wrapper.instrument_app_callback(call_callback)
+        callback_name = get_callback_name(callback)
+        logger = self._wrapper.logger
 
         @self._wrapper.handle_exception_and_logging(callback)
         async def listen_event_callback(
@@ -100,12 +220,12 @@ class CallbacksPlugin(AppPlugin):
             event: str,
             event_data: dict[str, Any],
         ) -> None:
-            self._wrapper.logger.trace(
-                "Calling Listen Event Callback: {cls_name}.{func_name} from callback_id: {callback_id}",
-                cls_name=callback.__self__.__class__.__name__ if inspect.ismethod(callback) else callback.__class__,
-                func_name=callback.__name__,
-                callback_id=callback_id,
-            )
+            if logger.isEnabledFor(TRACE_LEVEL):
+                logger.trace(
+                    "Calling Listen Event Callback: {callback_name} from callback_id: {callback_id}",
+                    callback_name=callback_name,
+                    callback_id=callback_id,
+                )
 
             if oneshot:
                 self.cancel_callback(callback_id)
@@ -143,27 +263,8 @@ class CallbacksPlugin(AppPlugin):
         immediate: bool = False,
         oneshot: bool = False,
     ) -> list[str]:
-        signature = inspect.signature(callback)
-        valid_params = set(signature.parameters.keys())
-
-        async def wrapper(entity_id: EntityID, attribute: str, old: HassValue, new: HassValue) -> None:
-            call_args = {}
-            if "entity_id" in valid_params:
-                call_args["entity_id"] = entity_id
-            if "attribute" in valid_params:
-                call_args["attribute"] = attribute
-            if "old" in valid_params:
-                call_args["old"] = old
-            if "new" in valid_params:
-                call_args["new"] = new
-
-            result = callback(**call_args)
-
-            if inspect.isawaitable(result):
-                await result
-
-        set_callback_true_information(wrapper, callback)
-        return self.listen_attribute_extended(entity_id, attribute, wrapper, immediate, oneshot)
+        call_callback = _build_callback_adapter(callback, _ATTRIBUTE_CALLBACK_PARAMETERS, _ATTRIBUTE_CALLBACK_ADAPTERS)
+        return self.__listen_attribute(entity_id, attribute, callback, call_callback, immediate, oneshot)
 
     def listen_state_extended(
         self,
@@ -200,20 +301,50 @@ class CallbacksPlugin(AppPlugin):
         *callback_args: P.args,
         **callback_kwargs: P.kwargs,
     ) -> list[str]:
-        context_logger.set(self._wrapper.logger)
-        target_entity_id = entity_id
-        if not isinstance(target_entity_id, Sequence):
-            target_entity_id = [target_entity_id]
+        return self.__listen_attribute(
+            entity_id,
+            attribute,
+            callback,
+            callback,
+            immediate,
+            oneshot,
+            *callback_args,
+            **callback_kwargs,
+        )
 
-        for eid in target_entity_id:
-            if isinstance(eid, str):
-                raise TypeError("Passed entity_id as str and not as EntityID")
+    def __listen_attribute(
+        self,
+        entity_id: EntityID | Sequence[EntityID],
+        attribute: str,
+        callback: Callable,
+        call_callback: Callable[
+            Concatenate[EntityID, str, HassValue, HassValue, P],
+            None | Awaitable[None],
+        ],
+        immediate: bool,  # noqa: FBT001
+        oneshot: bool,  # noqa: FBT001
+        *callback_args: P.args,
+        **callback_kwargs: P.kwargs,
+    ) -> list[str]:
+        context_logger.set(self._wrapper.logger)
+        target_entity_id = tuple(dict.fromkeys(_ensure_entity_id(eid) for eid in wrap_entity_id_as_list(entity_id)))
 
         self.__hass.warn_if_entity_doesnt_exists(target_entity_id)
+        target_entity_id_set = frozenset(target_entity_id)
 
-        target_entity_id = set(target_entity_id)
+        instrumented_callback = self._wrapper.instrument_app_callback(call_callback)
+        callback_cls_name = get_callback_class(callback)
+        callback_func_name = get_callback_true_name(callback)
 
-        instrumented_callback = self._wrapper.instrument_app_callback(callback)
+        def extract_attribute_values(
+            new_state: Mapping[str, Any],
+            old_state: Mapping[str, Any],
+        ) -> tuple[HassValue, HassValue, bool]:
+            old_value = (old_state.get("attributes") or _EMPTY_STATE).get(attribute)
+            new_value = (new_state.get("attributes") or _EMPTY_STATE).get(attribute)
+            return old_value, new_value, old_value != new_value
+
+        extract_values = _VALUE_EXTRACTORS.get(attribute, extract_attribute_values)
 
         @self._wrapper.handle_exception_and_logging(callback)
         async def listen_attribute_callback(
@@ -224,7 +355,7 @@ class CallbacksPlugin(AppPlugin):
             context_logger.set(self._wrapper.logger)
             event_entity_id = get_type_instance_for_entity_id(event_data["entity_id"])
 
-            if event_entity_id not in target_entity_id:
+            if event_entity_id not in target_entity_id_set:
                 self._wrapper.logger.warning(
                     "Received callback for entity_id that should not be part of"
                     " callback. '{event_entity_id}' not in '{target_entity_id}'",
@@ -232,33 +363,21 @@ class CallbacksPlugin(AppPlugin):
                     target_entity_id=target_entity_id,
                 )
 
-            new_state = event_data.get("new_state", {}) or {}
-            old_state = event_data.get("old_state", {}) or {}
-
-            if attribute == "all":
-                old_value = old_state
-                new_value = new_state
-
-            elif attribute == "state":
-                old_value = old_state.get("state", None)
-                new_value = new_state.get("state", None)
-
-                if old_value == new_value:
-                    return
+            new_state = event_data.get("new_state") or _EMPTY_STATE
+            old_state = event_data.get("old_state") or _EMPTY_STATE
 
-            else:
-                old_value = old_state.get("attributes", {}).get(attribute, None)
-                new_value = new_state.get("attributes", {}).get(attribute, None)
+            if new_state is _EMPTY_STATE and old_state is _EMPTY_STATE:
+                return
 
-                if old_value == new_value:
-                    return
+            old_value, new_value, changed = extract_values(new_state, old_state)
 
-            callback_cls_name = get_callback_class(callback)
+            if not changed:
+                return
 
             self._wrapper.logger.trace(
                 "Calling Entity Callback: {cls_name}.{func_name}",
                 cls_name=callback_cls_name,
-                func_name=get_callback_true_name(callback),
+                func_name=callback_func_name,
             )
 
             if oneshot:
@@ -274,22 +393,18 @@ class CallbacksPlugin(AppPlugin):
                 **callback_kwargs,
             )
 
-        callback_id = [
-            self.__register.add_event_callback(
-                self._wrapper,
-                listen_attribute_callback,
-                f"state_changed={eid}",
-            )
-            for eid in target_entity_id
-        ]
+        callback_id = self.__register.add_event_callbacks(
+            self._wrapper,
+            listen_attribute_callback,
+            [f"state_changed={eid}" for eid in target_entity_id],
+        )
 
         if immediate:
 
             @self._wrapper.handle_exception_and_logging(callback)
             async def immediate_callback(callback_id: str) -> None:
-                all_eid = wrap_entity_id_as_list(entity_id)
                 all_callbacks: list[Awaitable[None]] = []
-                for eid in all_eid:
+                for eid in target_entity_id:
                     eid_state = self.__hass.get_full_state(eid)
                     if eid_state is not None:
                         all_callbacks.append(
@@ -371,17 +486,12 @@ class CallbacksPlugin(AppPlugin):
         delta: Interval | None,
         initial_date: datetime.date,
     ) -> datetime.datetime:
-        sun_locations = astral_location.sun(initial_date, local=True)
-        sun_event_datetime = sun_locations[sun_event]
+        sun_event_datetime = _get_sun_events(astral_location, initial_date)[sun_event]
         if delta is not None:
             sun_event_datetime = sun_event_datetime + delta.to_timedelta()
 
         if sun_event_datetime < datetime.datetime.now(tz=datetime.UTC):
-            sun_locations = astral_location.sun(
-                initial_date + datetime.timedelta(days=1),
-                local=True,
-            )
-            sun_event_datetime = sun_locations[sun_event]
+            sun_event_datetime = _get_sun_events(astral_location, initial_date + datetime.timedelta(days=1))[sun_event]
             if delta is not None:
                 sun_event_datetime = sun_event_datetime + delta.to_timedelta()
 
@@ -409,7 +519,7 @@ class CallbacksPlugin(AppPlugin):
             sun_event,
             astral_location,
             delta,
-            datetime.datetime.now(tz=get_main_config().get_timezone()).date(),
+            datetime.datetime.now(tz=get_config_timezone()).date(),
         )
 
         self._wrapper.logger.trace(
@@ -420,16 +530,15 @@ class CallbacksPlugin(AppPlugin):
         )
 
         instrumented_callback = self._wrapper.instrument_app_callback(callback)
+        callback_name = get_callback_name(callback)
+        logger = self._wrapper.logger
 
         @self._wrapper.handle_exception_and_logging(callback)
         async def scheduled_callback(callback_id: str) -> None:
-            self._wrapper.logger.trace(
-                "Calling Sun Event Callback: {cls_name}.{func_name}",
-                cls_name=get_callback_class(callback),
-                func_name=callback.__name__,
-            )
+            if logger.isEnabledFor(TRACE_LEVEL):
+                logger.trace("Calling Sun Event Callback: {callback_name}", callback_name=callback_name)
 
-            tomorrow = datetime.datetime.now(tz=get_main_config().get_timezone()).date() + datetime.timedelta(days=1)
+            tomorrow = datetime.datetime.now(tz=get_config_timezone()).date() + datetime.timedelta(days=1)
             # Calculate next sun event
             new_sun_event_datetime = self.__get_next_sun_event_date(
                 sun_event,
@@ -476,16 +585,7 @@ class CallbacksPlugin(AppPlugin):
         **callback_kwargs: P.kwargs,
     ) -> str:
         context_logger.set(self._wrapper.logger)
-        instrumented_callback = self._wrapper.instrument_app_callback(callback)
-
-        @self._wrapper.handle_exception_and_logging(callback)
-        async def scheduled_callback(callback_id: str) -> None:
-            self._wrapper.logger.trace(
-                "Calling Timer Callback: {callback_name}",
-                callback_name=get_callback_name(callback),
-            )
-
-            await instrumented_callback(callback_id, *callback_args, **callback_kwargs)
+        scheduled_callback = self.__make_timer_callback(callback, callback_args, callback_kwargs)
 
         current_date = get_datetime_now_with_config_timezone()
 
@@ -508,13 +608,10 @@ class CallbacksPlugin(AppPlugin):
         **callback_kwargs: P.kwargs,
     ) -> str:
         if isinstance(time, datetime.time):
-            true_start = datetime.datetime.combine(
-                datetime.datetime.now(tz=get_main_config().get_timezone()).date(),
-                time,
-            )
-            true_start = get_main_config().get_timezone().localize(true_start)
+            timezone = get_config_timezone()
+            current_time = datetime.datetime.now(tz=timezone)
 
-            current_time = datetime.datetime.now(tz=get_main_config().get_timezone())
+            true_start = datetime.datetime.combine(current_time.date(), time, tzinfo=timezone)
 
             _logcore.trace(
                 "DT check: true_start: {true_start} [isAware: {true_start_aware}]"
@@ -593,7 +690,6 @@ class CallbacksPlugin(AppPlugin):
         **callback_kwargs: P.kwargs,
     ) -> str:
         context_logger.set(self._wrapper.logger)
-        instrumented_callback = self._wrapper.instrument_app_callback(callback)
 
         if not interval.is_valid():
             raise DomovoySchedulerError(
@@ -603,7 +699,7 @@ class CallbacksPlugin(AppPlugin):
         if start == "now":
             start = get_datetime_now_with_config_timezone()
         elif isinstance(start, str):
-            start = parse(start)
+            start = parse_datetime(start)
 
         self._wrapper.logger.trace(
             "Configuring run_every callback with interval: `{interval}` starting at `{start}`",
@@ -611,26 +707,28 @@ class CallbacksPlugin(AppPlugin):
             start=start,
         )
 
-        @self._wrapper.handle_exception_and_logging(callback)
-        async def timer_callback(callback_id: str) -> None:
-            self._wrapper.logger.trace(
-                "Calling Timer Callback: {cls_name}.{func_name}",
-                cls_name=callback.__self__.__class__.__name__,  # type: ignore
-                func_name=callback.__name__,
-            )
-
-            await instrumented_callback(callback_id, *callback_args, **callback_kwargs)
-
         return self.__register.add_scheduler_callback(
             self._wrapper,
-            timer_callback,
+            self.__make_timer_callback(callback, callback_args, callback_kwargs),
             interval,
             start,
         )
 
+    def __make_timer_callback(
+        self,
+        callback: Callable[P, None | Awaitable[None]],
+        callback_args: tuple[Any, ...],
+        callback_kwargs: dict[str, Any],
+    ) -> Callable[[str], Awaitable[None]]:
+        instrumented_callback = self._wrapper.instrument_app_callback(callback)
+        callback_name = get_callback_name(callback)
+        logger = self._wrapper.logger
+
+        @self._wrapper.handle_exception_and_logging(callback)
+        async def timer_callback(callback_id: str) -> None:
+            if logger.isEnabledFor(TRACE_LEVEL):
+                logger.trace("Calling Timer Callback: {callback_name}", callback_name=callback_name)
 
-def wrap_entity_id_as_list(val: EntityID | Sequence[EntityID]) -> list[EntityID]:
-    if isinstance(val, Sequence):
-        return list(val)
+            await instrumented_callback(callback_id, *callback_args, **callback_kwargs)
 
-    return [val]
+        return timer_callback
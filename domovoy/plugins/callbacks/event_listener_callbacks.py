@@ -1,30 +1,36 @@
 from __future__ import annotations
 
-from collections.abc import Awaitable, Callable
-from typing import Protocol
-
-from domovoy.plugins.hass.types import HassValue
-
-EventListenerCallbackEmpty = Callable[[], None | Awaitable[None]]
-
-
-# Full Callback
-class EventListenerCallbackFull(Protocol):
-    def __call__(self, *, event_name: str, data: dict[str, HassValue]) -> None | Awaitable[None]: ...
-
-
-# Single Parameter Callback
-class EventListenerCallbackWithEventName(Protocol):
-    def __call__(self, *, event_name: str) -> None | Awaitable[None]: ...
-
-
-class EventListenerCallbackWithEventData(Protocol):
-    def __call__(self, *, data: dict[str, HassValue]) -> None | Awaitable[None]: ...
-
-
-EventListenerCallback = (
-    EventListenerCallbackFull
-    | EventListenerCallbackWithEventName
-    | EventListenerCallbackWithEventData
-    | EventListenerCallbackEmpty
-)
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+    from typing import Protocol
+
+    from domovoy.plugins.hass.types import HassValue
+
+    type EventListenerCallbackEmpty = Callable[[], None | Awaitable[None]]
+
+    # Full Callback
+    class EventListenerCallbackFull(Protocol):
+        def __call__(self, *, event_name: str, data: dict[str, HassValue]) -> None | Awaitable[None]: ...
+
+    # Single Parameter Callback
+    class EventListenerCallbackWithEventName(Protocol):
+        def __call__(self, *, event_name: str) -> None | Awaitable[None]: ...
+
+    class EventListenerCallbackWithEventData(Protocol):
+        def __call__(self, *, data: dict[str, HassValue]) -> None | Awaitable[None]: ...
+
+    type EventListenerCallback = (
+        EventListenerCallbackFull
+        | EventListenerCallbackWithEventName
+        | EventListenerCallbackWithEventData
+        | EventListenerCallbackEmpty
+    )
+else:
+    # Only type checkers need the structural shapes. At runtime these are plain Callable aliases so importing
+    # this module doesn't build a Protocol class per signature
+    EventListenerCallbackEmpty = Callable
+    EventListenerCallbackFull = Callable
+    EventListenerCallback = Callable
@@ -1,39 +1,190 @@
 from __future__ import annotations
 
 import asyncio
-from collections.abc import Awaitable, Callable, Sequence
+import functools
+import logging
+import sys
+from collections.abc import Awaitable, Callable, Iterator, Sequence
 from dataclasses import dataclass
 from typing import Any, Concatenate, ParamSpec
 
 from domovoy.applications.types import Interval
 from domovoy.core.app_infra import AppWrapper
-from domovoy.core.context import context_callback_id, context_logger
-from domovoy.core.logging import get_logger
+from domovoy.core.context import set_context_logger
+from domovoy.core.logging import TRACE_LEVEL, LoggerAdapterWithTrace, get_logger
+from domovoy.core.utils import get_callback_name
 from domovoy.plugins import callbacks
-from domovoy.plugins.hass.domains import get_type_instance_for_entity_id
+from domovoy.plugins.hass.domains import get_type_instance_for_entity_id, wrap_entity_id_as_list
 from domovoy.plugins.hass.exceptions import HassUnknownEntityError
 from domovoy.plugins.plugins import AppPlugin
 
 from .core import EntityState, HassCore
-from .exceptions import HassApiCommandError
+from .exceptions import HassApiCommandError, HassResponseRequiredError
 from .synthetic import HassSyntheticDomainsServiceCalls
 from .types import EntityID, HassData, HassValue, PrimitiveHassValue
 
+__all__ = ["HassPlugin", "wrap_entity_id_as_list"]
+
 P = ParamSpec("P")
 
 _missing_entities_logger = get_logger("missing_entitites")
 
+_MISSING = object()
+
+_SERVICE_CONTROL_KEYS = frozenset(("domovoy_drop_target", "service_data_entity_id"))
+_SERVICE_RESERVED_KEYS = _SERVICE_CONTROL_KEYS | {"entity_id"}
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_service_name(service_name: str) -> tuple[str, str] | None:
+    domain, separator, service = service_name.partition(".")
+
+    if not separator or "." in service:
+        return None
+
+    return domain, service
+
+
+def _is_valid_entity_id_target(entity_id: object) -> bool:
+    # Entities are always instances of EntityID subclasses, so an exact type check can't be used here
+    if isinstance(entity_id, EntityID):
+        return True
+
+    if isinstance(entity_id, list):
+        return all(isinstance(sub, EntityID) for sub in entity_id)
+
+    return False
+
+
+@dataclass(slots=True, frozen=True)
+class _TriggerSubscription:
+    instrumented_callback: Callable[..., Awaitable[None]]
+    callback_name: str
+    logger: LoggerAdapterWithTrace[Any]
+    unsubscribe_trigger: Callable[[int], Awaitable[bool]]
+    oneshot: bool
+    callback_args: tuple[Any, ...]
+    callback_kwargs: dict[str, Any]
+
+
+async def _dispatch_trigger(
+    subscription_id: int,
+    trigger_vars: HassData,
+    *,
+    subscription: _TriggerSubscription,
+) -> None:
+    logger = subscription.logger
+    if logger.isEnabledFor(TRACE_LEVEL):
+        logger.trace(
+            "Calling Listen Trigger Callback: {callback_name} from callback_id: {subscription_id}",
+            callback_name=subscription.callback_name,
+            subscription_id=subscription_id,
+        )
+
+    if subscription.oneshot:
+        await subscription.unsubscribe_trigger(subscription_id)
+
+    await subscription.instrumented_callback(
+        subscription_id,
+        trigger_vars,
+        *subscription.callback_args,
+        **subscription.callback_kwargs,
+    )
+
+
+class _WaitForStateCallback:
+    __slots__ = (
+        "__callback_ids",
+        "__cancel_callback",
+        "__duration_delta",
+        "__future",
+        "__get_full_state",
+        "__target_states",
+        "__timer",
+    )
+
+    def __init__(
+        self,
+        future: asyncio.Future[None],
+        target_states: frozenset[str],
+        duration: Interval | None,
+        get_full_state: Callable[[EntityID], EntityState],
+        cancel_callback: Callable[[str], None],
+    ) -> None:
+        self.__future = future
+        self.__target_states = target_states
+        self.__duration_delta = duration.to_timedelta() if duration is not None else None
+        self.__get_full_state = get_full_state
+        self.__cancel_callback = cancel_callback
+        self.__timer: asyncio.TimerHandle | None = None
+        self.__callback_ids: list[str] = []
+
+        # However the wait ends (match, timeout or cancellation), the listeners and timer must go away with it
+        future.add_done_callback(self.__cleanup)
+
+    def track_callback_ids(self, callback_ids: list[str]) -> None:
+        if self.__future.done():
+            for callback_id in callback_ids:
+                self.__cancel_callback(callback_id)
+        else:
+            self.__callback_ids = callback_ids
+
+    def __call__(
+        self,
+        entity: EntityID,
+        _attribute: str,
+        _old: HassValue,
+        new: HassValue,
+    ) -> None:
+        if self.__future.done():
+            return
+
+        # Any state change restarts the wait, so a pending timer is no longer valid
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+
+        if new not in self.__target_states:
+            return
+
+        if self.__duration_delta is not None:
+            time_in_state = self.__get_full_state(entity).get_time_in_current_state()
+            remaining = (self.__duration_delta - time_in_state).total_seconds()
+
+            if remaining > 0:
+                self.__timer = self.__future.get_loop().call_later(remaining, self.__complete)
+                return
+
+        self.__complete()
+
+    def __complete(self) -> None:
+        self.__timer = None
 
-@dataclass
-class ServiceDetails:
-    has_response: bool
+        if not self.__future.done():
+            self.__future.set_result(None)
+
+    def __cleanup(self, _future: asyncio.Future[None]) -> None:
+        if self.__timer is not None:
+            self.__timer.cancel()
+            self.__timer = None
+
+        for callback_id in self.__callback_ids:
+            self.__cancel_callback(callback_id)
+
+        self.__callback_ids = []
 
 
 class HassPlugin(AppPlugin):
     __hass: HassCore
     _wrapper: AppWrapper
     __callbacks: callbacks.CallbacksPlugin
-    __cached_service_definitions: dict[str, ServiceDetails] | None = None
+    __cached_service_definitions: dict[str, bool] | None = None
+    __hass_call_service: Callable[..., Awaitable[HassData | None]]
+    __hass_get_state: Callable[[EntityID], EntityState | None]
+    __hass_entity_exists_in_cache: Callable[[EntityID], bool]
+    __hass_fire_event: Callable[[str, HassData | None], Awaitable[None]]
+    __hass_subscribe_trigger: Callable[..., Awaitable[int]]
+    __hass_unsubscribe_trigger: Callable[[int], Awaitable[bool]]
 
     def __init__(
         self,
@@ -45,6 +196,14 @@ class HassPlugin(AppPlugin):
         self.__hass = hass_core
         self.services = HassSyntheticDomainsServiceCalls(self)
 
+        # Bound once so the hot paths don't look the methods up on HassCore on every call
+        self.__hass_call_service = hass_core.call_service
+        self.__hass_get_state = hass_core.get_state
+        self.__hass_entity_exists_in_cache = hass_core.entity_exists_in_cache
+        self.__hass_fire_event = hass_core.fire_event
+        self.__hass_subscribe_trigger = hass_core.subscribe_trigger
+        self.__hass_unsubscribe_trigger = hass_core.unsubscribe_trigger
+
     def prepare(self) -> None:
         super().prepare()
         self.__callbacks = self._wrapper.get_pluginx(callbacks.CallbacksPlugin)
@@ -57,7 +216,7 @@ class HassPlugin(AppPlugin):
         if isinstance(entity_id, str):
             entity_id = get_type_instance_for_entity_id(entity_id)
 
-        entity_state = self.__hass.get_state(entity_id)
+        entity_state = self.__hass_get_state(entity_id)
 
         if entity_state is None:
             raise HassUnknownEntityError(entity_id)
@@ -65,18 +224,28 @@ class HassPlugin(AppPlugin):
         return entity_state
 
     def warn_if_entity_doesnt_exists(self, entity_id: EntityID | Sequence[EntityID] | None) -> None:
-        if entity_id is None:
+        # The check exists only to log, so there is nothing to do when the warning would be dropped
+        if not entity_id or not _missing_entities_logger.isEnabledFor(logging.WARNING):
+            return
+
+        if isinstance(entity_id, EntityID):
+            if not self.__hass_entity_exists_in_cache(entity_id):
+                self.__warn_missing_entity(entity_id, self._wrapper.get_app_name_for_logs())
             return
 
-        entity_id = wrap_entity_id_as_list(entity_id)
+        missing_entity_ids = self.__hass.get_missing_entity_ids(entity_id)
 
-        for eid in entity_id:
-            if not self.__hass.entity_exists_in_cache(eid):
-                _missing_entities_logger.warning(
-                    "[{app_name}] '{entity_id}' doesn't exist in Hass.",
-                    entity_id=eid,
-                    app_name=self._wrapper.get_app_name_for_logs(),
-                )
+        if missing_entity_ids:
+            app_name = self._wrapper.get_app_name_for_logs()
+            for eid in missing_entity_ids:
+                self.__warn_missing_entity(eid, app_name)
+
+    def __warn_missing_entity(self, entity_id: EntityID, app_name: str) -> None:
+        _missing_entities_logger.warning(
+            "[{app_name}] '{entity_id}' doesn't exist in Hass.",
+            entity_id=entity_id,
+            app_name=app_name,
+        )
 
     def get_entity_id_by_attribute(
         self,
@@ -85,18 +254,26 @@ class HassPlugin(AppPlugin):
     ) -> list[EntityID]:
         return self.__hass.get_entity_id_by_attribute(attribute, value)
 
+    def iter_all_entities(self) -> Iterator[EntityState]:
+        # Prefer this over get_all_entities when only iterating, as it doesn't copy the state cache.
+        # The iterator must be consumed before yielding to the event loop, since state updates change the cache
+        return self.__hass.iter_all_entities()
+
     def get_all_entities(self) -> list[EntityState]:
         return self.__hass.get_all_entities()
 
     def get_all_entity_ids(self) -> frozenset[EntityID]:
-        return self.__hass.get_all_entity_ids()
+        return self.__hass.snapshot_entity_ids()
+
+    def get_entity_registry_version(self) -> int:
+        return self.__hass.get_entity_registry_version()
 
     async def fire_event(
         self,
         event_type: str,
         event_data: HassData | None = None,
     ) -> None:
-        await self.__hass.fire_event(event_type, event_data)
+        await self.__hass_fire_event(event_type, event_data)
 
     async def get_service_definitions(self) -> HassData:
         return await self.__hass.get_service_definitions()
@@ -109,35 +286,23 @@ class HassPlugin(AppPlugin):
         *callback_args: P.args,
         **callback_kwargs: P.kwargs,
     ) -> str:
-        context_logger.set(self._wrapper.logger)
-
-        instrumented_callback = self._wrapper.instrument_app_callback(callback)
-
-        @self._wrapper.handle_exception_and_logging(callback)
-        async def listen_trigger_callback(
-            subscription_id: int,
-            trigger_vars: HassData,
-        ) -> None:
-            self._wrapper.logger.trace(
-                "Calling Listen Trigger Callback: {cls_name}.{func_name} from callback_id: {subscription_id}",
-                cls_name=callback.__self__.__class__.__name__,  # type: ignore
-                func_name=callback.__name__,
-                subscription_id=subscription_id,
-            )
-
-            if oneshot:
-                await self.__hass.unsubscribe_trigger(subscription_id)
-
-            await instrumented_callback(
-                subscription_id,
-                trigger_vars,
-                *callback_args,
-                **callback_kwargs,
-            )
+        set_context_logger(self._wrapper.logger)
+
+        dispatcher = self._wrapper.handle_exception_and_logging(callback)(_dispatch_trigger)
+
+        subscription = _TriggerSubscription(
+            instrumented_callback=self._wrapper.instrument_app_callback(callback),
+            callback_name=get_callback_name(callback),
+            logger=self._wrapper.logger,
+            unsubscribe_trigger=self.__hass_unsubscribe_trigger,
+            oneshot=oneshot,
+            callback_args=callback_args,
+            callback_kwargs=callback_kwargs,
+        )
 
         return str(
-            await self.__hass.subscribe_trigger(
-                listen_trigger_callback,
+            await self.__hass_subscribe_trigger(
+                functools.partial(dispatcher, subscription=subscription),
                 trigger,
             ),
         )
@@ -150,76 +315,84 @@ class HassPlugin(AppPlugin):
         throw_on_error: bool = False,
         **kwargs: HassValue,
     ) -> HassData | None:
-        service_name_segments = service_name.split(".")
+        parsed_service_name = _parse_service_name(service_name)
 
-        if len(service_name_segments) != 2:
+        if parsed_service_name is None:
             self._wrapper.logger.error(
                 "Cannot call service {service_name}. Invalid service name",
                 service_name=service_name,
             )
             return None
 
-        domain = service_name_segments[0]
-        service = service_name_segments[1]
+        domain, service = parsed_service_name
 
-        entity_id: EntityID | list[EntityID] | None = None
-        if "entity_id" in kwargs and ("domovoy_drop_target" not in kwargs or not kwargs["domovoy_drop_target"]):
-            # We add the ignore because there is no easy way
-            # to restrict the typing of kwargs until python 3.12
-            entity_id = kwargs["entity_id"]  # type: ignore
-
-            if (
-                entity_id is None
-                or (isinstance(entity_id, list) and not all(isinstance(sub, EntityID) for sub in entity_id))
-                or (not isinstance(entity_id, EntityID) and not isinstance(entity_id, list))
-            ):
-                self._wrapper.logger.error(
-                    "Cannot call service `{service_name}`. The `entity_id` key has an invalid type."
-                    " Only `EntityID` or `list[EntityID]` are allowed. If passing a list, make sure "
-                    "all the elements are EntityID. {entity_id}",
-                    service_name=service_name,
-                    entity_id=entity_id,
-                )
-                return None
+        drop_target = kwargs.get("domovoy_drop_target", False)
+        service_data_entity_id = kwargs.get("service_data_entity_id")
 
-            kwargs.pop("entity_id")
+        # When the target is dropped, entity_id is sent as regular service data
+        reserved_keys = _SERVICE_CONTROL_KEYS if drop_target else _SERVICE_RESERVED_KEYS
+        service_data: HassData = {k: v for k, v in kwargs.items() if k not in reserved_keys}
 
-        if "domovoy_drop_target" in kwargs:
-            kwargs.pop("domovoy_drop_target")
+        entity_id: EntityID | list[EntityID] | None = None
+        if not drop_target:
+            target = kwargs.get("entity_id", _MISSING)
+
+            if target is not _MISSING:
+                if not _is_valid_entity_id_target(target):
+                    self._wrapper.logger.error(
+                        "Cannot call service `{service_name}`. The `entity_id` key has an invalid type."
+                        " Only `EntityID` or `list[EntityID]` are allowed. If passing a list, make sure "
+                        "all the elements are EntityID. {entity_id}",
+                        service_name=service_name,
+                        entity_id=target,
+                    )
+                    return None
 
-        if "service_data_entity_id" in kwargs:
-            val = get_type_instance_for_entity_id(str(kwargs["service_data_entity_id"]))
-            kwargs.pop("service_data_entity_id")
+                # We add the ignore because there is no easy way
+                # to restrict the typing of kwargs until python 3.12
+                entity_id = target  # type: ignore
+
+        if service_data_entity_id is not None:
+            val = get_type_instance_for_entity_id(str(service_data_entity_id))
             self.warn_if_entity_doesnt_exists(val if val else None)
-            kwargs["entity_id"] = val
+            service_data["entity_id"] = val
 
         self.warn_if_entity_doesnt_exists(entity_id)
 
-        try:
-            return await self.__hass.call_service(
-                domain=domain,
-                service=service,
-                service_data=kwargs,
-                entity_id=entity_id,
-                return_response=return_response,
-            )
-        except HassApiCommandError as e:
-            if throw_on_error:
-                raise
-
-            if e.message == "Service call requires responses but caller did not ask for responses":
-                return await self.call_service(
-                    service_name,
-                    return_response=True,
-                    throw_on_error=throw_on_error,
-                    **kwargs,
+        service_definitions = self.__cached_service_definitions
+
+        # Skip the failed round trip for services we already know return a response
+        if not return_response and service_definitions is not None and service_definitions.get(service_name, False):
+            return_response = True
+
+        # If Hass tells us the service needs to return a response, retry once asking for it
+        for attempt_return_response in (return_response, True):
+            try:
+                return await self.__hass_call_service(
+                    domain=domain,
+                    service=service,
+                    service_data=service_data,
+                    entity_id=entity_id,
+                    return_response=attempt_return_response,
                 )
+            except HassApiCommandError as e:
+                if throw_on_error:
+                    raise
 
-            self._wrapper.logger.error(
-                "There was an error when executing the command. "
-                "Exception was not raised to app. Message: {exception_message}",
-                exception_message=str(e),
-            )
+                if not attempt_return_response and isinstance(e, HassResponseRequiredError):
+                    if service_definitions is not None:
+                        service_definitions[sys.intern(service_name)] = True
+
+                    continue
+
+                self._wrapper.logger.error(
+                    "There was an error when executing the command. "
+                    "Exception was not raised to app. Message: {exception_message}",
+                    exception_message=str(e),
+                )
+                return None
+
+        return None
 
     async def wait_for_state_to_be(
         self,
@@ -248,51 +421,33 @@ class HassPlugin(AppPlugin):
         states: str | list[str],
         duration: Interval | None = None,
     ) -> asyncio.Future[None]:
-        future = asyncio.get_event_loop().create_future()
-
-        if isinstance(states, str):
-            states = [states]
-
-        async def state_callback(
-            entity: EntityID,
-            _attribute: str,
-            _old: HassValue,
-            new: HassValue,
-        ) -> None:
-            callback_id: str = context_callback_id.get()  # type: ignore
-
-            if new in states and not future.done():
-                entity_full_state = self.get_full_state(entity)
-                if duration is not None and not entity_full_state.has_been_in_current_state_for_at_least(
-                    duration,
-                ):
-                    await asyncio.sleep(
-                        (duration.to_timedelta() - entity_full_state.get_time_in_current_state()).total_seconds() + 0.5,
-                    )
+        future = asyncio.get_running_loop().create_future()
 
-                    if not self.get_full_state(
-                        entity,
-                    ).has_been_in_current_state_for_at_least(duration):
-                        return
+        target_states = frozenset((states,) if isinstance(states, str) else states)
 
-                self.__callbacks.cancel_callback(callback_id)
-                future.set_result(None)
+        state_callback = _WaitForStateCallback(
+            future,
+            target_states,
+            duration,
+            self.get_full_state,
+            self.__callbacks.cancel_callback,
+        )
 
-        self.__callbacks.listen_state_extended(entity_id, state_callback, immediate=True)
+        state_callback.track_callback_ids(
+            self.__callbacks.listen_state_extended(entity_id, state_callback, immediate=True),
+        )
 
         return future
 
-    async def _get_cached_service_definitions(self, *, reset: bool = False) -> dict[str, ServiceDetails]:
+    async def _get_cached_service_definitions(self, *, reset: bool = False) -> dict[str, bool]:
         if self.__cached_service_definitions is None or reset is True:
             domains: dict[str, Any] = await self.get_service_definitions()
 
-            service_definitions = {}
-
-            for domain, services in sorted(domains.items()):
-                for service, details in sorted(services.items()):
-                    service_definitions[f"{domain}.{service}"] = ServiceDetails(has_response="response" in details)
-
-            self.__cached_service_definitions = service_definitions
+            self.__cached_service_definitions = {
+                sys.intern(f"{domain}.{service}"): "response" in details
+                for domain, services in domains.items()
+                for service, details in services.items()
+            }
 
         return self.__cached_service_definitions
 
@@ -305,10 +460,3 @@ class HassPlugin(AppPlugin):
 
     async def send_raw_command(self, command_type: str, command_args: HassData) -> HassData | list[HassData]:
         return await self.__hass.send_raw_command(command_type, command_args)
-
-
-def wrap_entity_id_as_list(val: EntityID | Sequence[EntityID]) -> list[EntityID]:
-    if isinstance(val, Sequence):
-        return list(val)
-
-    return [val]
@@ -1,29 +1,51 @@
 from __future__ import annotations
 
 import asyncio
-from collections import deque
+import functools
+import itertools
+import random
+import re
 from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
 from enum import StrEnum
+from typing import cast
 
 from websockets.asyncio.client import ClientConnection, connect
 from websockets.exceptions import ConnectionClosed, ConnectionClosedError
 
 from domovoy.core.logging import get_logger
+from domovoy.core.task_utils import run_and_forget_task
 
 from .exceptions import (
     HassApiAuthenticationError,
     HassApiCommandError,
     HassApiConnectionError,
     HassApiParseError,
+    HassResponseRequiredError,
 )
 from .parsing import encode_message, parse_message
-from .types import EntityID, HassData
+from .types import EntityID, HassData, HassValue
 
 _logcore = get_logger(__name__)
 _messages_logcore = get_logger(f"{__name__}.messages")
 
+_EVENT_ID_RE = re.compile(r'\{"id":(\d+),"type":"event"')
+_LARGE_MESSAGE_SIZE = 256_000
+_RECONNECT_INITIAL_DELAY = 1.0
+_RECONNECT_MAX_DELAY = 30.0
+_RESPONSE_REQUIRED_ERROR_MESSAGE = "Service call requires responses but caller did not ask for responses"
+
 EventListenerCallable = Callable[[str, HassData], Awaitable[None]]
 TriggerListenerCallable = Callable[[int, HassData], Awaitable[None]]
+EventPayloadExtractor = Callable[[int, HassData], tuple[str | int, HassData]]
+
+
+def _extract_event_payload(_subscription_id: int, event: HassData) -> tuple[str | int, HassData]:
+    return event["event_type"], event["data"]  # type: ignore
+
+
+def _extract_trigger_payload(subscription_id: int, event: HassData) -> tuple[str | int, HassData]:
+    return subscription_id, event["variables"].get("trigger", {})  # type: ignore
 
 
 class HassApiConnectionState(StrEnum):
@@ -33,23 +55,25 @@ class HassApiConnectionState(StrEnum):
 
 
 class HassWebsocketApi:
-    __cmd_queue: deque[HassData]
-    __in_flight_ops: dict[
+    __loop: asyncio.AbstractEventLoop
+    __parse_executor: ThreadPoolExecutor
+    __cmd_queue: asyncio.Queue[HassData | bytes]
+    __encoded_templates: dict[str, bytes]
+    __in_flight_futures: dict[int, asyncio.Future[HassValue]]
+    __in_flight_commands: dict[int, HassData]
+    __full_response_ops: set[int]
+    __event_callbacks: dict[
         int,
-        tuple[HassData, asyncio.Future[HassData]],
+        tuple[EventListenerCallable | TriggerListenerCallable, EventPayloadExtractor],
     ]
-    __event_callbacks: dict[int, EventListenerCallable | TriggerListenerCallable]
-    __current_op_id = 2
+    __next_op_id: Callable[[], int]
     __msg_receive_task: asyncio.Task[None] | None = None
     __msg_send_task: asyncio.Task[None] | None = None
     __is_running: bool = False
     __uri: str = ""
     __access_token: str
     __parse_datetimes: bool
-    __connection_state_callback: Callable[[HassApiConnectionState], Awaitable[None]]
-    __connection_state_task: list[asyncio.Task[None]]
-
-    async def __dummy_callback(*_args: object, **_kwargs: object) -> None: ...
+    __connection_state_callback: Callable[[HassApiConnectionState], Awaitable[None]] | None
 
     def __init__(
         self,
@@ -59,19 +83,25 @@ class HassWebsocketApi:
         *,
         parse_datetimes: bool = True,
     ) -> None:
-        self.__in_flight_ops = {}
+        self.__in_flight_futures = {}
+        self.__in_flight_commands = {}
+        self.__full_response_ops = set()
         self.__event_callbacks = {}
-        self.__connection_state_task = []
-        self.__cmd_queue = deque([])
+        self.__cmd_queue = asyncio.Queue()
+        self.__next_op_id = itertools.count(2).__next__
+        self.__encoded_templates = {}
         self.__uri = uri
         self.__access_token = access_token
-        self.__connection_state_callback = connection_state_callback or self.__dummy_callback
+        self.__connection_state_callback = connection_state_callback
         self.__parse_datetimes = parse_datetimes
+        # A single worker keeps large messages decoded in the order they arrived
+        self.__parse_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hass_api_parser")
 
     def start(self) -> asyncio.Future[None]:
         _logcore.info("Starting Home Assistant API")
-        future: asyncio.Future[None] = asyncio.get_event_loop().create_future()
-        asyncio.get_event_loop().create_task(
+        self.__loop = asyncio.get_running_loop()
+        future: asyncio.Future[None] = self.__loop.create_future()
+        self.__loop.create_task(
             self.__connect_and_listen(future),
             name="hass_api_connect_and_listen",
         )
@@ -85,22 +115,31 @@ class HassWebsocketApi:
             "Notifying connection state update: `{state}`",
             state=connection_state,
         )
-        task = asyncio.get_event_loop().create_task(
+
+        if self.__connection_state_callback is None:
+            return
+
+        run_and_forget_task(
             self.__connection_state_callback(connection_state),  # type: ignore
             name="hass_api_connection_state_callback",
         )
-        self.__connection_state_task.append(task)
-        task.add_done_callback(self.__connection_state_task.remove)
 
     async def __connect_and_listen(self, future: asyncio.Future[None]) -> None:
         self.__is_running = True
 
+        delay = _RECONNECT_INITIAL_DELAY
         while True:
             try:
                 websocket = await self.__connect_to_ha()
                 break
             except Exception:
-                await asyncio.sleep(1)
+                await asyncio.sleep(delay + random.uniform(0, delay * 0.25))
+                delay = min(delay * 2, _RECONNECT_MAX_DELAY)
+
+            if not self.__is_running:
+                if not future.done():
+                    future.set_result(None)
+                return
 
         try:
             self.__notify_connection_state_update(HassApiConnectionState.CONNECTING)
@@ -138,14 +177,17 @@ class HassWebsocketApi:
 
             _logcore.trace("Hass API Tasks have been cancelled.")
 
-            for op_id in list(self.__in_flight_ops.keys()):
-                _logcore.trace("Cancelling Pending Future with ID `{id}`", id=op_id)
+            pending_futures = self.__in_flight_futures
+            self.__in_flight_futures = {}
+            self.__in_flight_commands = {}
+            self.__full_response_ops = set()
 
-                _, in_flight_future = self.__in_flight_ops[op_id]
+            connection_error = HassApiConnectionError()
+            for op_id, in_flight_future in pending_futures.items():
+                _logcore.trace("Cancelling Pending Future with ID `{id}`", id=op_id)
 
-                self.__in_flight_ops.pop(op_id)
                 if not in_flight_future.done():
-                    in_flight_future.set_exception(HassApiConnectionError())
+                    in_flight_future.set_exception(connection_error)
 
         except HassApiAuthenticationError as e:
             _logcore.info("Authentication to Home Assistant Failed")
@@ -180,6 +222,9 @@ class HassWebsocketApi:
             self.__notify_connection_state_update(HassApiConnectionState.DISCONNECTED)
 
     def stop(self) -> None:
+        # Runs even when already stopped (e.g. after a failed authentication) so the parser thread never outlives us
+        self.__parse_executor.shutdown(wait=False, cancel_futures=True)
+
         if not self.__is_running:
             return
 
@@ -195,7 +240,22 @@ class HassWebsocketApi:
     async def hass_message_receiver(self, websocket: ClientConnection) -> None:
         try:
             async for message_raw in websocket:
-                message = parse_message(message_raw, parse_datetimes=self.__parse_datetimes)
+                # Events for subscriptions we no longer track can be dropped before paying for a full decode
+                event_id_match = _EVENT_ID_RE.match(message_raw) if type(message_raw) is str else None
+                if event_id_match is not None and int(event_id_match[1]) not in self.__event_callbacks:
+                    _logcore.warning(
+                        "Received an Event without a registered Callback. Callback ID: `{id}`",
+                        id=event_id_match[1],
+                    )
+                    continue
+
+                if len(message_raw) > _LARGE_MESSAGE_SIZE:
+                    message = await self.__loop.run_in_executor(
+                        self.__parse_executor,
+                        functools.partial(parse_message, message_raw, parse_datetimes=self.__parse_datetimes),
+                    )
+                else:
+                    message = parse_message(message_raw, parse_datetimes=self.__parse_datetimes)
 
                 message_id: int = message["id"]  # type: ignore
                 message_type = message["type"]
@@ -207,48 +267,28 @@ class HassWebsocketApi:
                 )
 
                 if message_type == "event":
-                    if message_id not in self.__event_callbacks:
+                    subscription = self.__event_callbacks.get(message_id)
+
+                    if subscription is None:
                         _logcore.warning(
                             "Received an Event without a registered Callback. Callback ID: `{id}`",
                             id=message_id,
                         )
                         continue
 
-                    event_callback = self.__event_callbacks[message_id]
-
-                    event: HassData = message["event"]  # type: ignore
-
-                    if "event_type" in event:
-                        event_type_or_subscription_id: str = event["event_type"]  # type: ignore
-                        data: HassData = event["data"]  # type: ignore
-
-                        _messages_logcore.trace(
-                            "Calling Callback for event {event_type} with data {event_data}",
-                            event_type=event_type_or_subscription_id,
-                            event_data=data,
-                        )
-
-                        entity_id = data.get("entity_id", None)
+                    event_callback, extract_payload = subscription
+                    event_type_or_subscription_id, data = extract_payload(message_id, message["event"])  # type: ignore
 
-                        _messages_logcore.trace(
-                            f"Received from listener with id: {message_id} "
-                            f"a `{event_type_or_subscription_id}` event for {entity_id}. {data}",
-                        )
-
-                    elif "variables" in event:
-                        event_type_or_subscription_id: int = message_id
-                        data = event["variables"].get("trigger", {})  # type: ignore
-
-                        _messages_logcore.trace(
-                            "Calling Callback for trigger with data {trigger_data}",
-                            trigger_data=data,
-                        )
+                    _messages_logcore.trace(
+                        "Calling Callback for listener with id: {id} and event `{event}` with data {event_data}",
+                        id=message_id,
+                        event=event_type_or_subscription_id,
+                        event_data=data,
+                    )
 
                     try:
-                        await asyncio.wait_for(
-                            event_callback(event_type_or_subscription_id, data),  # type: ignore
-                            timeout=5,
-                        )
+                        async with asyncio.timeout(5):
+                            await event_callback(event_type_or_subscription_id, data)  # type: ignore
                     except asyncio.exceptions.CancelledError:
                         _logcore.trace(
                             "Cancelled Error for callback to Message ID: `{id}`",
@@ -270,15 +310,20 @@ class HassWebsocketApi:
 
                     continue
 
-                if message_id not in self.__in_flight_ops:
+                future = self.__in_flight_futures.pop(message_id, None)
+
+                if future is None:
                     _logcore.warning(
                         "Received a response for ID {id} that does not have an in-flight command. Ignoring...",
                         id=message_id,
                     )
                     continue
 
-                (cmd, future) = self.__in_flight_ops[message_id]
-                self.__in_flight_ops.pop(message_id)
+                cmd = self.__in_flight_commands.pop(message_id)
+
+                full_response = message_id in self.__full_response_ops
+                if full_response:
+                    self.__full_response_ops.discard(message_id)
 
                 if future.done():
                     if self.__is_running:
@@ -292,8 +337,13 @@ class HassWebsocketApi:
 
                 if "error" in message:
                     error = message["error"]
+                    error_class = (
+                        HassResponseRequiredError
+                        if error["message"] == _RESPONSE_REQUIRED_ERROR_MESSAGE  # type: ignore
+                        else HassApiCommandError
+                    )
                     future.set_exception(
-                        HassApiCommandError(
+                        error_class(
                             command_id=message["id"],  # type: ignore
                             code=error["code"],  # type: ignore
                             message=error["message"],  # type: ignore
@@ -313,8 +363,9 @@ class HassWebsocketApi:
                             original_command=cmd,
                         ),
                     )
+                    continue
 
-                future.set_result(message)
+                future.set_result(message if full_response else message.get("result"))
 
         except asyncio.CancelledError:
             _logcore.trace("hass_message_receiver() was cancelled")
@@ -327,23 +378,29 @@ class HassWebsocketApi:
     async def producer_handler(self, websocket: ClientConnection) -> None:
         try:
             while True:
-                while len(self.__cmd_queue) > 0:
-                    message = self.__cmd_queue.popleft()
+                messages = [await self.__cmd_queue.get()]
+
+                # Drain whatever else is already queued so a burst goes out back-to-back
+                while not self.__cmd_queue.empty():
+                    messages.append(self.__cmd_queue.get_nowait())
+
+                encoded_messages: list[bytes] = []
+                for message in messages:
+                    if isinstance(message, bytes):
+                        encoded_messages.append(message)
+                        continue
+
                     message_id: int = message["id"]  # type: ignore
                     try:
-                        encoded_message = encode_message(message)
-                        _logcore.trace("Sending message to hass")
-                        await websocket.send(encoded_message, text=True)
+                        encoded_messages.append(encode_message(message))
                     except HassApiParseError as e:
-                        (cmd, future) = self.__in_flight_ops[message_id]
-                        self.__in_flight_ops.pop(message_id)
-                        future.set_exception(e)
+                        self.__in_flight_commands.pop(message_id)
+                        self.__full_response_ops.discard(message_id)
+                        self.__in_flight_futures.pop(message_id).set_exception(e)
 
-                # We do this to make sure this function yields
-                # the event loop after it attemps to send messages.
-                # If not, the code will get stuck on the while True:
-                # loop until websocket.send yields.
-                await asyncio.sleep(0.25)
+                _logcore.trace("Sending {count} messages to hass", count=len(encoded_messages))
+                for encoded_message in encoded_messages:
+                    await websocket.send(encoded_message, text=True)
 
         except asyncio.CancelledError:
             return
@@ -399,32 +456,77 @@ class HassWebsocketApi:
         )
 
     def __prep_for_connection(self) -> None:
-        self.__cmd_queue = deque()
-        self.__in_flight_ops = {}
-        self.__event_callbacks = {}
+        while not self.__cmd_queue.empty():
+            self.__cmd_queue.get_nowait()
+
+        self.__in_flight_futures.clear()
+        self.__in_flight_commands.clear()
+        self.__full_response_ops.clear()
+        self.__event_callbacks.clear()
+        self.__next_op_id = itertools.count(2).__next__
 
     # Home Assistant API Below
 
     def __send_command(
         self,
         command: HassData,
-    ) -> asyncio.Future[HassData]:
+        *,
+        full_response: bool = False,
+    ) -> asyncio.Future[HassValue]:
         _logcore.trace("Queueing Command to HA: {command}", command=command)
 
-        # create Future
-        future = asyncio.get_event_loop().create_future()
+        future, command_id = self.__track_command(command, full_response=full_response)
 
-        # this might need a lock to make the operation atomic
-        command["id"] = self.__current_op_id
-        self.__in_flight_ops[command["id"]] = (command, future)
-        self.__current_op_id += 1
+        # Commands that carry nothing but their type only differ by id once encoded, so splice it into a cached frame
+        if len(command) == 2:
+            self.__cmd_queue.put_nowait(self.__encode_from_template(command["type"], command_id))  # type: ignore
+        else:
+            self.__cmd_queue.put_nowait(command)
+
+        return future
 
-        self.__cmd_queue.append(command)
+    async def __send_command_for_envelope(self, command: HassData) -> HassData:
+        # With full_response the future resolves with the whole reply message, which is always a JSON object
+        return cast("HassData", await self.__send_command(command, full_response=True))
+
+    def __send_type_only_command(self, command_type: str) -> asyncio.Future[HassValue]:
+        _logcore.trace("Queueing Command to HA: {command_type}", command_type=command_type)
+
+        future, command_id = self.__track_command({"type": command_type}, full_response=False)
+        self.__cmd_queue.put_nowait(self.__encode_from_template(command_type, command_id))
 
         return future
 
+    def __track_command(
+        self,
+        command: HassData,
+        *,
+        full_response: bool,
+    ) -> tuple[asyncio.Future[HassValue], int]:
+        future = self.__loop.create_future()
+
+        command_id = self.__next_op_id()
+        command["id"] = command_id
+        self.__in_flight_futures[command_id] = future
+        self.__in_flight_commands[command_id] = command
+
+        # Most callers only want the "result" payload; the few that inspect the envelope opt in here
+        if full_response:
+            self.__full_response_ops.add(command_id)
+
+        return future, command_id
+
+    def __encode_from_template(self, command_type: str, command_id: int) -> bytes:
+        template = self.__encoded_templates.get(command_type)
+
+        if template is None:
+            template = encode_message({"id": 0, "type": command_type})
+            self.__encoded_templates[command_type] = template
+
+        return template.replace(b'"id":0', b'"id":%d' % command_id, 1)
+
     async def ping(self) -> bool:
-        response = await self.__send_command({"type": "ping"})
+        response = await self.__send_command_for_envelope({"type": "ping"})
         return response["type"] == "pong"
 
     async def subscribe_events(
@@ -442,11 +544,11 @@ class HassWebsocketApi:
         if event_type is not None:
             cmd["event_type"] = event_type
 
-        response = await self.__send_command(cmd)
+        response = await self.__send_command_for_envelope(cmd)
 
         subscription_id: int = response["id"]  # type: ignore
 
-        self.__event_callbacks[subscription_id] = callback
+        self.__event_callbacks[subscription_id] = (callback, _extract_event_payload)
 
         _logcore.trace(
             "Received Response for subscribe_event call for event: {event_type}. Response: {response}",
@@ -467,11 +569,11 @@ class HassWebsocketApi:
 
         cmd: HassData = {"type": "subscribe_trigger", "trigger": trigger}
 
-        response = await self.__send_command(cmd)
+        response = await self.__send_command_for_envelope(cmd)
 
         subscription_id: int = response["id"]  # type: ignore
 
-        self.__event_callbacks[subscription_id] = callback
+        self.__event_callbacks[subscription_id] = (callback, _extract_trigger_payload)
 
         _logcore.trace(
             "Received Response for subscribe_trigger call for event: {trigger}. Response: {response}",
@@ -485,7 +587,7 @@ class HassWebsocketApi:
             "Calling unsubscribe_events with subscription_id: {subscription_id}",
             subscription_id=subscription_id,
         )
-        response = await self.__send_command(
+        response = await self.__send_command_for_envelope(
             {"type": "unsubscribe_events", "subscription": subscription_id},
         )
 
@@ -518,17 +620,17 @@ class HassWebsocketApi:
         if event_data is not None:
             cmd["event_data"] = event_data
 
-        response = await self.__send_command(cmd)
+        result = cast("HassData", await self.__send_command(cmd))
 
         _logcore.trace(
             "Received Response for fire_event call for event: {event_type} and data: {event_data}."
             " Response: {response}",
             event_type=event_type,
             event_data=event_data,
-            response=response,
+            response=result,
         )
 
-        return response["result"]  # type: ignore
+        return result
 
     async def call_service(
         self,
@@ -558,58 +660,43 @@ class HassWebsocketApi:
         if entity_id is not None:
             cmd["target"] = {"entity_id": entity_id}  # type: ignore
 
-        response = await self.__send_command(cmd)
+        result = cast("HassData | None", await self.__send_command(cmd))
 
         _logcore.trace(
             "Received Response for call_service call for {domain}.{service}: {response}",
             domain=domain,
             service=service,
-            response=response,
+            response=result,
         )
-        return response["result"]  # type: ignore
+        return result
 
     async def get_states(
         self,
     ) -> list[HassData]:
-        response = await self.__send_command(
-            {
-                "type": "get_states",
-            },
-        )
-
-        return response["result"]  # type: ignore
+        return cast("list[HassData]", await self.__send_type_only_command("get_states"))
 
     async def get_services(
         self,
     ) -> HassData:
-        response = await self.__send_command(
-            {
-                "type": "get_services",
-            },
-        )
-
-        return response["result"]  # type: ignore
+        return cast("HassData", await self.__send_type_only_command("get_services"))
 
     async def search_related(
         self,
         item_type: str,
         item_id: str,
     ) -> HassData:
-        response = await self.__send_command(
-            {
-                "type": "search/related",
-                "item_type": item_type,
-                "item_id": item_id,
-            },
+        return cast(
+            "HassData",
+            await self.__send_command(
+                {
+                    "type": "search/related",
+                    "item_type": item_type,
+                    "item_id": item_id,
+                },
+            ),
         )
 
-        return response["result"]  # type: ignore
-
     async def send_command(self, command_type: str, command_args: HassData) -> HassData | list[HassData]:
         command = command_args | {"type": command_type}
 
-        response = await self.__send_command(
-            command,
-        )
-
-        return response["result"]  # type: ignore
+        return cast("HassData | list[HassData]", await self.__send_command(command))
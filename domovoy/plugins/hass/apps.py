@@ -1,3 +1,4 @@
+from collections import defaultdict
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
@@ -6,7 +7,6 @@ from domovoy.app import stop_domovoy
 from domovoy.applications import AppBase, AppConfigBase, EmptyAppConfig
 from domovoy.applications.types import Interval
 from domovoy.plugins.hass.domains import get_type_instance_for_entity_id
-from domovoy.plugins.hass.types import EntityID
 from domovoy.plugins.servents.enums import ButtonDeviceClass, EntityCategory
 
 from .entities import generate_stub_file_for_synthetic_entities  # type: ignore
@@ -57,42 +57,45 @@ class HassSyntheticEntitiesStubUpdaterConfig(AppConfigBase):
 
 
 class HassSyntheticEntitiesStubUpdater(AppBase[HassSyntheticEntitiesStubUpdaterConfig]):
-    __registered_entities: frozenset[EntityID] = frozenset()
+    __registered_entities_version: int = -1
 
     async def initialize(self) -> None:
-        self.__registered_entities: frozenset[EntityID] = frozenset()
+        self.__registered_entities_version: int = -1
         self.log.info("HassSyntheticEntitiesStubUpdater is initializing")
         self.callbacks.run_every(self.config.update_frequency, self.update_stubs, "now")
 
     async def update_stubs(self) -> None:
-        entity_ids = self.hass.get_all_entity_ids()
+        registry_version = self.hass.get_entity_registry_version()
 
-        if entity_ids == self.__registered_entities:
+        if registry_version == self.__registered_entities_version:
             self.log.trace("No updates to registered entities")
             return
 
+        entity_ids = self.hass.get_all_entity_ids()
+
         self.log.info("Updating Home Assitant Entities Stub File")
         Path(self.config.stub_path).parent.mkdir(parents=True, exist_ok=True)
 
-        domains: dict[str, set[str]] = {}
+        string_entity_ids = [entity_id for entity_id in entity_ids if isinstance(entity_id, str)]
 
-        for entity_id in entity_ids:
-            if isinstance(entity_id, str):
+        if string_entity_ids:
+            for entity_id in string_entity_ids:
                 self.log.warning(
                     "Detected an string in a list that should only contain EntityIDs: '{entity_id}'",
                     entity_id=entity_id,
                 )
-                entity_id = get_type_instance_for_entity_id(entity_id)  # noqa: PLW2901
 
-            domain = entity_id.get_domain()
-            entity = entity_id.get_entity_name()
+            entity_ids = [
+                get_type_instance_for_entity_id(entity_id) if isinstance(entity_id, str) else entity_id
+                for entity_id in entity_ids
+            ]
 
-            if domain not in domains:
-                domains[domain] = set()
+        domains: defaultdict[str, set[str]] = defaultdict(set)
 
-            domains[domain].add(entity)
+        for entity_id in entity_ids:
+            domains[entity_id.get_domain()].add(entity_id.get_entity_name())
 
-        self.__registered_entities = entity_ids
+        self.__registered_entities_version = registry_version
 
         generate_stub_file_for_synthetic_entities(
             domains,
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import datetime
-from collections.abc import Awaitable, Callable, Sequence
-from dataclasses import dataclass, field
+from collections.abc import Awaitable, Callable, Iterable, Iterator, KeysView, Sequence
+from collections.abc import Set as AbstractSet
 from typing import Any, Literal, ParamSpec
 
 from domovoy.applications.types import Interval
-from domovoy.core.logging import get_logger
+from domovoy.core.logging import TRACE_LEVEL, get_logger
 from domovoy.core.services.event_listener import EventListener
 from domovoy.core.services.service import DomovoyService, DomovoyServiceResources
 from domovoy.core.task_utils import run_and_forget_task
@@ -15,6 +16,7 @@ from domovoy.plugins.hass.domains import get_type_instance_for_entity_id
 
 from .api import HassApiConnectionState, HassWebsocketApi
 from .exceptions import HassApiCommandError
+from .parsing import parse_hass_datetime
 from .types import EntityID, HassData, PrimitiveHassValue
 
 _logcore = get_logger(__name__)
@@ -22,38 +24,128 @@ _logcore = get_logger(__name__)
 P = ParamSpec("P")
 
 
-@dataclass(frozen=True)
+_NOW_CACHE_RESOLUTION = 0.001
+_now_cache_loop_time: float = float("-inf")
+_now_cache_value: datetime.datetime = datetime.datetime.min.replace(tzinfo=datetime.UTC)
+
+
+def _now_cached() -> datetime.datetime:
+    # Automations often check many entities within the same loop iteration, so they share one now() per millisecond
+    global _now_cache_loop_time, _now_cache_value
+
+    try:
+        loop_time = asyncio.get_running_loop().time()
+    except RuntimeError:
+        return datetime.datetime.now(tz=datetime.UTC)
+
+    if loop_time - _now_cache_loop_time >= _NOW_CACHE_RESOLUTION:
+        _now_cache_loop_time = loop_time
+        _now_cache_value = datetime.datetime.now(tz=datetime.UTC)
+
+    return _now_cache_value
+
+
+def _as_datetime(value: datetime.datetime | str) -> datetime.datetime:
+    # Already converted when the API parses datetimes; raw ISO strings only appear when that is disabled
+    if type(value) is str:
+        return parse_hass_datetime(value)
+
+    return value  # type: ignore
+
+
 class EntityState:
+    __slots__ = (
+        "_raw_data",
+        "attributes",
+        "context",
+        "entity_id",
+        "last_changed",
+        "last_updated",
+        "state",
+    )
+
     entity_id: EntityID
     state: PrimitiveHassValue
     last_changed: datetime.datetime
     last_updated: datetime.datetime
-    raw_data: HassData
-    attributes: HassData = field(default_factory=dict)
-    context: HassData = field(default_factory=dict)
+    attributes: HassData
+    context: HassData
+    _raw_data: HassData | None
+
+    def __init__(
+        self,
+        entity_id: EntityID,
+        state: PrimitiveHassValue,
+        last_changed: datetime.datetime,
+        last_updated: datetime.datetime,
+        attributes: HassData,
+        context: HassData,
+    ) -> None:
+        self.entity_id = entity_id
+        self.state = state
+        self.last_changed = last_changed
+        self.last_updated = last_updated
+        self.attributes = attributes
+        self.context = context
+        self._raw_data = None
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> EntityState:
-        return EntityState(
+        return cls(
             entity_id=get_type_instance_for_entity_id(data["entity_id"]),
             state=data["state"],
-            last_changed=data["last_changed"],
-            last_updated=data["last_updated"],
+            last_changed=_as_datetime(data["last_changed"]),
+            last_updated=_as_datetime(data["last_updated"]),
             attributes=data["attributes"],
             context=data["context"],
-            raw_data=data,
         )
 
+    @property
+    def raw_data(self) -> HassData:
+        # Most states are never serialized back, so the dict is only rebuilt when someone asks for it
+        if self._raw_data is None:
+            self._raw_data = {
+                "entity_id": str(self.entity_id),
+                "state": self.state,
+                "attributes": self.attributes,
+                "last_changed": self.last_changed,
+                "last_updated": self.last_updated,
+                "context": self.context,
+            }
+
+        return self._raw_data
+
     def to_dict(self) -> HassData:
         return self.raw_data
 
+    def __repr__(self) -> str:
+        return (
+            f"EntityState(entity_id={self.entity_id!r}, state={self.state!r}, last_changed={self.last_changed!r}, "
+            f"last_updated={self.last_updated!r}, attributes={self.attributes!r}, context={self.context!r})"
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, EntityState):
+            return NotImplemented
+
+        return (
+            self.entity_id == other.entity_id
+            and self.state == other.state
+            and self.last_changed == other.last_changed
+            and self.last_updated == other.last_updated
+            and self.attributes == other.attributes
+            and self.context == other.context
+        )
+
+    __hash__ = None  # type: ignore
+
     def get_time_in_current_state(self) -> datetime.timedelta:
-        now = datetime.datetime.now(tz=datetime.UTC)
+        now = _now_cached()
         return now - self.last_changed
 
     def has_been_in_state_for_at_least(
         self,
-        target_states: PrimitiveHassValue | Sequence[PrimitiveHassValue],
+        target_states: PrimitiveHassValue | Sequence[PrimitiveHassValue] | AbstractSet[PrimitiveHassValue],
         interval: Interval,
     ) -> bool:
         if not interval.is_valid():
@@ -61,31 +153,30 @@ class EntityState:
 
         entity_state = self.state
 
-        target_states = (
-            list(target_states)
-            if isinstance(target_states, Sequence) and not isinstance(target_states, str)
-            else [target_states]
-        )
-
-        if entity_state not in target_states:
+        # Sets are matched in O(1), so callers checking against many states can pass a frozenset
+        if isinstance(target_states, str) or not isinstance(target_states, Sequence | AbstractSet):
+            if entity_state != target_states:
+                return False
+        elif entity_state not in target_states:
             return False
 
         duration = interval.to_timedelta()
-        now = datetime.datetime.now(tz=datetime.UTC)
+        now = _now_cached()
         minimum_time = self.last_changed + duration
 
-        _logcore.trace(
-            "hass_been_in_state_calculation {vals}",
-            vals={
-                "entity_id": self.entity_id,
-                "target_states": target_states,
-                "duration": duration,
-                "now": now.isoformat(),
-                "last_changed": self.last_changed.isoformat(),
-                "minimum_time": minimum_time.isoformat(),
-                "return_value": now >= minimum_time,
-            },
-        )
+        if _logcore.isEnabledFor(TRACE_LEVEL):
+            _logcore.trace(
+                "hass_been_in_state_calculation {vals}",
+                vals={
+                    "entity_id": self.entity_id,
+                    "target_states": target_states,
+                    "duration": duration,
+                    "now": now.isoformat(),
+                    "last_changed": self.last_changed.isoformat(),
+                    "minimum_time": minimum_time.isoformat(),
+                    "return_value": now >= minimum_time,
+                },
+            )
 
         return now >= minimum_time
 
@@ -96,14 +187,29 @@ class EntityState:
         return self.has_been_in_state_for_at_least(self.state, interval)
 
 
+def _remove_from_bucket(buckets: dict[Any, set[EntityID]], key: Any, entity_id: EntityID) -> None:  # noqa: ANN401
+    bucket = buckets.get(key)
+
+    if bucket is None:
+        return
+
+    bucket.discard(entity_id)
+    if not bucket:
+        del buckets[key]
+
+
 class HassCore(DomovoyService):
     __event_publisher: EventListener
     __hass_api: HassWebsocketApi
     __entity_state_cache: dict[EntityID, EntityState]
+    __entity_registry_version: int = 0
+    __attribute_presence: dict[str, set[EntityID]]
+    __attribute_values: dict[str, dict[Any, set[EntityID]]]
     __state_subscription_id: int | None = None
     __start_future: asyncio.Future[None] | None = None
     __resources: DomovoyServiceResources
     __is_running: bool = False
+    __hass_started_event: asyncio.Event
     __reload_reason: Literal["init", "hass_restart", "disconnected"] | None = "init"
 
     def __init__(
@@ -113,6 +219,9 @@ class HassCore(DomovoyService):
     ) -> None:
         super().__init__(resources)
         self.__entity_state_cache = {}
+        self.__attribute_presence = {}
+        self.__attribute_values = {}
+        self.__hass_started_event = asyncio.Event()
         self.__event_publisher = event_publisher
         self.__resources = resources
 
@@ -145,15 +254,13 @@ class HassCore(DomovoyService):
                 is_hass_up = await self.__is_hass_up()
 
                 if not is_hass_up:
-                    count = 0
                     _logcore.info("Waiting to make sure HA is fully initialized (max 5 minutes wait)")
 
-                    while not is_hass_up and count < 300:
-                        await asyncio.sleep(0.5)  # We are waiting for HASS to fully start
-                        is_hass_up = await self.__is_hass_up()
-                        count += 0.5
-
-                    if not is_hass_up:
+                    # We are already subscribed, so HA announcing it finished starting wakes us up right away
+                    try:
+                        async with asyncio.timeout(300):
+                            await self.__hass_started_event.wait()
+                    except TimeoutError:
                         _logcore.warn("Home Assistant is not up yet. Continuing Initialization")
 
                 await self.start_apps()
@@ -165,6 +272,7 @@ class HassCore(DomovoyService):
             if self.__is_running and self.__reload_reason is None:
                 _logcore.warning("Unexpected Disconnection from Home Assistant")
                 self.__reload_reason = "disconnected"
+                self.__hass_started_event.clear()
                 await self.__resources.stop_dependent_apps_callback()
 
             if self.__is_running:
@@ -190,7 +298,7 @@ class HassCore(DomovoyService):
         _logcore.info("Starting HassCore")
         self.__is_running = True
         self.__connect_to_hass()
-        self.__start_future = asyncio.get_event_loop().create_future()
+        self.__start_future = asyncio.get_running_loop().create_future()
 
         return self.__start_future
 
@@ -222,6 +330,9 @@ class HassCore(DomovoyService):
         event_type: str,
         event_data: dict[str, Any],
     ) -> None:
+        if event_type == "homeassistant_started":
+            self.__hass_started_event.set()
+
         if event_type == "homeassistant_started" and self.__reload_reason == "hass_restart":
             _logcore.warning(
                 "Received Homeassistant started event. Starting any stopped app that use Hass API",
@@ -236,13 +347,12 @@ class HassCore(DomovoyService):
             self.__reload_reason = "hass_restart"
             await self.__resources.stop_dependent_apps_callback()
 
+        events_to_publish: list[tuple[str, dict[str, Any]]] = []
+
         if event_type == "state_changed":
             try:
                 await self.__process_state_changed(event_data)
-                await self.__event_publisher.publish_event(
-                    f"{event_type}={event_data['entity_id']}",
-                    event_data,
-                )
+                events_to_publish.append((f"{event_type}={event_data['entity_id']}", event_data))
 
             except Exception as e:
                 _logcore.exception(
@@ -250,10 +360,12 @@ class HassCore(DomovoyService):
                     e,
                     event_data=event_data,
                 )
-        await self.__event_publisher.publish_event(event_type, event_data)
+
+        events_to_publish.append((event_type, event_data))
+        await self.__event_publisher.publish_events(events_to_publish)
 
     async def __process_state_changed(self, event_data: dict[str, HassData]) -> None:
-        entity_id = get_type_instance_for_entity_id(str(event_data["entity_id"]))
+        entity_id = get_type_instance_for_entity_id(event_data["entity_id"])  # type: ignore
 
         if event_data.get("new_state") is None:
             _logcore.trace(
@@ -266,21 +378,21 @@ class HassCore(DomovoyService):
 
         new_entity_data = EntityState.from_dict(event_data["new_state"])
 
-        if entity_id not in self.__entity_state_cache:
-            self.__update_entity_state_cache(entity_id, new_entity_data)
-            return
+        cached_entity_data = self.__entity_state_cache.get(entity_id)
 
-        if self.__entity_state_cache[entity_id].last_updated > new_entity_data.last_updated:
-            _logcore.critical(
-                "Tried to replace a newer state on entity_cache with an older state. "
-                f"Original State Date: {self.__entity_state_cache[entity_id].last_updated.isoformat()} "
-                f"Updated State Date: {new_entity_data.last_updated.isoformat()} "
-                f"Original State: {self.__entity_state_cache[entity_id]}. "
-                f"Updated State: {new_entity_data}",
-            )
+        if cached_entity_data is None:
+            self.__update_entity_state_cache(entity_id, new_entity_data)
             return
 
-        if self.__entity_state_cache[entity_id].last_updated == new_entity_data.last_updated:
+        if cached_entity_data.last_updated >= new_entity_data.last_updated:
+            if cached_entity_data.last_updated > new_entity_data.last_updated:
+                _logcore.critical(
+                    "Tried to replace a newer state on entity_cache with an older state. "
+                    f"Original State Date: {cached_entity_data.last_updated.isoformat()} "
+                    f"Updated State Date: {new_entity_data.last_updated.isoformat()} "
+                    f"Original State: {cached_entity_data}. "
+                    f"Updated State: {new_entity_data}",
+                )
             return
 
         self.__update_entity_state_cache(entity_id, new_entity_data)
@@ -290,10 +402,46 @@ class HassCore(DomovoyService):
             _logcore.warning("Tried to register a string as an EntityID: '{entity_id}'", entity_id=entity_id)
             entity_id = get_type_instance_for_entity_id(entity_id)
 
+        previous_data = self.__entity_state_cache.get(entity_id)
         self.__entity_state_cache[entity_id] = entity_data
 
+        if previous_data is None:
+            self.__entity_registry_version += 1
+            self.__index_attributes(entity_id, {}, entity_data.attributes)
+        else:
+            self.__index_attributes(entity_id, previous_data.attributes, entity_data.attributes)
+
     def __pop_entity_state_cache(self, entity_id: EntityID) -> None:
-        self.__entity_state_cache.pop(entity_id)
+        previous_data = self.__entity_state_cache.pop(entity_id, None)
+
+        if previous_data is None:
+            return
+
+        self.__entity_registry_version += 1
+        self.__index_attributes(entity_id, previous_data.attributes, {})
+
+    def __index_attributes(self, entity_id: EntityID, old_attributes: HassData, new_attributes: HassData) -> None:
+        for attribute, old_value in old_attributes.items():
+            if attribute in new_attributes:
+                if new_attributes[attribute] == old_value:
+                    continue
+            else:
+                _remove_from_bucket(self.__attribute_presence, attribute, entity_id)
+
+            buckets = self.__attribute_values.get(attribute)
+            if buckets is not None:
+                with contextlib.suppress(TypeError):
+                    _remove_from_bucket(buckets, old_value, entity_id)
+
+        for attribute, new_value in new_attributes.items():
+            if attribute not in old_attributes:
+                self.__attribute_presence.setdefault(attribute, set()).add(entity_id)
+            elif old_attributes[attribute] == new_value:
+                continue
+
+            # Unhashable values (lists, dicts) are left out of the index and matched by scanning on lookup
+            with contextlib.suppress(TypeError):
+                self.__attribute_values.setdefault(attribute, {}).setdefault(new_value, set()).add(entity_id)
 
     def get_state(self, entity_id: EntityID) -> EntityState | None:
         return self.__entity_state_cache.get(entity_id, None)
@@ -301,18 +449,39 @@ class HassCore(DomovoyService):
     def entity_exists_in_cache(self, entity_id: EntityID) -> bool:
         return entity_id in self.__entity_state_cache
 
+    def get_missing_entity_ids(self, entity_ids: Iterable[EntityID]) -> list[EntityID]:
+        cache = self.__entity_state_cache
+        return [entity_id for entity_id in entity_ids if entity_id not in cache]
+
     def get_entity_id_by_attribute(self, attribute: str, value: PrimitiveHassValue | None) -> list[EntityID]:
+        if value is None:
+            return list(self.__attribute_presence.get(attribute, ()))
+
+        # Unhashable query values are not in the index, so they fall through to the scan below
+        with contextlib.suppress(TypeError):
+            return list(self.__attribute_values.get(attribute, {}).get(value, ()))
+
+        cache = self.__entity_state_cache
         return [
-            x.entity_id
-            for x in self.__entity_state_cache.values()
-            if attribute in x.attributes and (value is None or x.attributes[attribute] == value)  # type: ignore
+            entity_id
+            for entity_id in self.__attribute_presence.get(attribute, ())
+            if cache[entity_id].attributes[attribute] == value
         ]
 
+    def iter_all_entities(self) -> Iterator[EntityState]:
+        return iter(self.__entity_state_cache.values())
+
     def get_all_entities(self) -> list[EntityState]:
         return list(self.__entity_state_cache.values())
 
-    def get_all_entity_ids(self) -> frozenset[EntityID]:
-        return frozenset(self.__entity_state_cache.keys())
+    def get_all_entity_ids(self) -> KeysView[EntityID]:
+        return self.__entity_state_cache.keys()
+
+    def snapshot_entity_ids(self) -> frozenset[EntityID]:
+        return frozenset(self.__entity_state_cache)
+
+    def get_entity_registry_version(self) -> int:
+        return self.__entity_registry_version
 
     async def fire_event(
         self,
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-import inspect
+import functools
 import sys
+from collections.abc import Sequence
 
 from domovoy.core.logging import get_logger
 
@@ -168,34 +169,81 @@ class WeatherEntity(EntityID): ...
 class ZoneEntity(EntityID): ...
 
 
-__defined_classes: dict[str, type[EntityID]] = {
-    x[0]: x[1]
-    for x in inspect.getmembers(
-        sys.modules[__name__],
-        lambda member: inspect.isclass(member) and member.__module__ == __name__,
-    )
+__domain_to_class: dict[str, type[EntityID]] = {
+    "automation": AutomationEntity,
+    "binary_sensor": BinarySensorEntity,
+    "button": ButtonEntity,
+    "calendar": CalendarEntity,
+    "camera": CameraEntity,
+    "climate": ClimateEntity,
+    "conversation": ConversationEntity,
+    "cover": CoverEntity,
+    "device_tracker": DeviceTrackerEntity,
+    "event": EventEntity,
+    "fan": FanEntity,
+    "image": ImageEntity,
+    "input_boolean": InputBooleanEntity,
+    "input_datetime": InputDatetimeEntity,
+    "input_number": InputNumberEntity,
+    "input_select": InputSelectEntity,
+    "input_text": InputTextEntity,
+    "light": LightEntity,
+    "lock": LockEntity,
+    "media_player": MediaPlayerEntity,
+    "notify": NotifyEntity,
+    "number": NumberEntity,
+    "person": PersonEntity,
+    "remote": RemoteEntity,
+    "scene": SceneEntity,
+    "schedule": ScheduleEntity,
+    "script": ScriptEntity,
+    "select": SelectEntity,
+    "sensor": SensorEntity,
+    "siren": SirenEntity,
+    "stt": SttEntity,
+    "sun": SunEntity,
+    "switch": SwitchEntity,
+    "todo": TodoEntity,
+    "tts": TtsEntity,
+    "update": UpdateEntity,
+    "vacuum": VacuumEntity,
+    "wake_word": WakeWordEntity,
+    "weather": WeatherEntity,
+    "zone": ZoneEntity,
 }
 
 
-def __to_camel_case(snake_str: str) -> str:
-    return "".join(x.capitalize() for x in snake_str.lower().split("_"))
-
-
+@functools.lru_cache(maxsize=128)
 def get_typestr_for_domain(domain: str) -> str:
-    entity_class_name = f"{__to_camel_case(domain)}Entity"
-    return entity_class_name if entity_class_name in __defined_classes else "EntityID"
+    return get_type_for_domain(domain).__name__
 
 
+@functools.lru_cache(maxsize=128)
 def get_type_for_domain(domain: str) -> type[EntityID]:
-    entity_class_name = f"{__to_camel_case(domain)}Entity"
-    return __defined_classes.get(entity_class_name, EntityID)
+    return __domain_to_class.get(domain.lower(), EntityID)
 
 
 def get_type_instance_for_entity_id(entity_id: str | EntityID) -> EntityID:
     if isinstance(entity_id, EntityID):
-        domain = entity_id.get_domain()
-    else:
-        split = entity_id.split(".")
-        domain: str = split[0]
+        return _entity_id_from_str(entity_id._entity_id)  # noqa: SLF001
+
+    return _entity_id_from_str(entity_id)
+
 
+# Entity ids are a bounded, stable set, so repeated lookups from state events and service calls hit the cache
+@functools.lru_cache(maxsize=4096)
+def _entity_id_from_str(entity_id: str) -> EntityID:
+    entity_id = sys.intern(entity_id)
+    domain, _, _ = entity_id.partition(".")
     return get_type_for_domain(domain)(entity_id)
+
+
+def wrap_entity_id_as_list(val: EntityID | Sequence[EntityID]) -> Sequence[EntityID]:
+    # The result is read-only, so lists are returned as is instead of copied
+    if type(val) is list:
+        return val
+
+    if isinstance(val, EntityID):
+        return [val]
+
+    return list(val)
@@ -57,3 +57,6 @@ class HassApiCommandError(HassError):
         self.full_response = full_response
         self.command_id = command_id
         self.code = code
+
+
+class HassResponseRequiredError(HassApiCommandError): ...
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import datetime
+import functools
 import re
 from typing import TypeVar
 
@@ -22,20 +23,46 @@ T = TypeVar("T")
 _logcore = get_logger("hass_parsing")
 
 
+def __decode_string(value: str) -> str | datetime.datetime:
+    # Cheap positional checks first so the regex and fromisoformat only see date-shaped strings
+    if len(value) < 10 or value[4] != "-" or value[7] != "-" or not pattern.match(value):
+        return value
+
+    try:
+        return parse_hass_datetime(value)
+    except (ValueError, TypeError):
+        return value
+
+
+# The same timestamp shows up several times per state_changed event (old/new state, last_changed/last_updated)
+@functools.lru_cache(maxsize=8192)
+def parse_hass_datetime(value: str) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(value)
+
+
 def __decode_response(msg: T) -> T:
-    if isinstance(msg, dict):
-        for key, value in msg.items():
-            msg[key] = __decode_response(value)
+    msg_type = type(msg)
+
+    if msg_type is dict:
+        for key, value in msg.items():  # type: ignore
+            value_type = type(value)
+            if value_type is str:
+                msg[key] = __decode_string(value)  # type: ignore
+            elif value_type is dict or value_type is list:
+                __decode_response(value)
         return msg
 
-    if isinstance(msg, list):
-        return [__decode_response(x) for x in msg]  # type: ignore
+    if msg_type is list:
+        for index, value in enumerate(msg):  # type: ignore
+            value_type = type(value)
+            if value_type is str:
+                msg[index] = __decode_string(value)  # type: ignore
+            elif value_type is dict or value_type is list:
+                __decode_response(value)
+        return msg
 
-    if isinstance(msg, str) and pattern.match(msg):
-        try:
-            return datetime.datetime.fromisoformat(msg)  # type: ignore
-        except (ValueError, TypeError):
-            return msg
+    if msg_type is str:
+        return __decode_string(msg)  # type: ignore
 
     return msg
 
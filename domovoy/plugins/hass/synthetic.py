@@ -1,5 +1,6 @@
 import datetime
 import re
+import sys
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Protocol
 
@@ -25,8 +26,9 @@ class HassSyntheticServiceCall:
         self.__hass = hass_plugin
 
     def __getattr__(self, service: str) -> HassServiceCall:
+        full_name = sys.intern(f"{self.__domain}.{service}")
+
         async def synthetic_service_call(**kwargs: HassValueStrict) -> dict[str, Any] | None:
-            full_name = f"{self.__domain}.{service}"
             service_definitions = await self.__hass._get_cached_service_definitions()  # noqa: SLF001
 
             if full_name not in service_definitions:
@@ -34,7 +36,7 @@ class HassSyntheticServiceCall:
 
             throw_on_error: bool = kwargs.pop("domovoy_throw_on_error", False)  # type: ignore
 
-            if full_name in service_definitions and service_definitions[full_name].has_response:
+            if service_definitions.get(full_name, False):
                 response: dict[str, Any] = await self.__hass.call_service(
                     full_name,
                     return_response=True,
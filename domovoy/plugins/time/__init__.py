@@ -2,11 +2,11 @@ import asyncio
 import datetime
 
 import pytz
-from dateutil.parser import parse
 
 from domovoy.applications.types import Interval
 from domovoy.core.app_infra import AppWrapper
 from domovoy.core.configuration import get_main_config
+from domovoy.core.utils import parse_datetime
 from domovoy.plugins.plugins import AppPlugin
 
 
@@ -18,7 +18,7 @@ class TimePlugin(AppPlugin):
         await asyncio.sleep(interval.total_seconds())
 
     def parse_date(self, string: str) -> datetime.datetime:
-        return parse(string)
+        return parse_datetime(string)
 
     def timedelta_from_now(
         self,
@@ -28,7 +28,7 @@ class TimePlugin(AppPlugin):
         if target_tz is None:
             target_tz = get_main_config().get_timezone()
 
-        date = date if isinstance(date, datetime.datetime) else parse(date)
+        date = date if isinstance(date, datetime.datetime) else parse_datetime(date)
 
         has_tz_info = date.tzinfo is not None and date.tzinfo.utcoffset(date) is not None
 
@@ -5,12 +5,11 @@ from typing import ParamSpec, TypeVar
 from warnings import deprecated
 
 import pytz
-from dateutil.parser import parse
 
 from domovoy.applications.types import Interval
 from domovoy.core.app_infra import AppWrapper
 from domovoy.core.configuration import get_main_config
-from domovoy.core.utils import as_float, as_int, get_callback_name
+from domovoy.core.utils import as_float, as_int, get_callback_name, parse_datetime
 from domovoy.plugins.plugins import AppPlugin
 
 TFloat = TypeVar("TFloat", bound=float | None)
@@ -72,7 +71,7 @@ class UtilsPlugin(AppPlugin):
 
     @deprecated("use time plugin")
     def parse_date(self, string: str) -> datetime.datetime:
-        return parse(string)
+        return parse_datetime(string)
 
     @deprecated("use time plugin")
     def timedelta_from_now(
@@ -83,7 +82,7 @@ class UtilsPlugin(AppPlugin):
         if target_tz is None:
             target_tz = get_main_config().get_timezone()
 
-        date = date if isinstance(date, datetime.datetime) else parse(date)
+        date = date if isinstance(date, datetime.datetime) else parse_datetime(date)
 
         has_tz_info = date.tzinfo is not None and date.tzinfo.utcoffset(date) is not None
 